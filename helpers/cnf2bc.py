@@ -1,44 +1,29 @@
 from meta.circuit import CustomCircuit
+from meta.cnf import OccurrenceIndex
 from meta.formula import And, Not, Or, Variable
 
 
-def extract_literals_on_occurrences(formula, literals):
-    dependencies_list = [
-        (
-            variable,
-            sum(variable in child.extract_variables() for child in formula.children),
-        )
-        for variable in literals
-    ]
-
-    sorted_dependencies = sorted(dependencies_list, key=lambda x: x[1], reverse=True)
-    result = [item[0] for item in sorted_dependencies]
-
-    return result
-
-
-def extract_literals_on_dependencies(formula, literals):
-    dependencies_list = []
-
-    for variable in literals:
-        visited_variables = set()
-        dependencies = 0
-        visited_variables.add(variable)
+def extract_literals_on_occurrences(formula, literals, index=None):
+    if index is None:
+        index = OccurrenceIndex(formula)
+    return sorted(literals, key=index.count, reverse=True)
 
-        for child in formula.ordered_children:
-            child_variables = set(
-                child.extract_variables()
-            )  # Ensure child_variables is a set
-            if variable in child_variables:
-                dependencies += len(child_variables - visited_variables)
-                visited_variables.update(child_variables)
 
-        dependencies_list.append((variable, dependencies))
+def extract_literals_on_dependencies(formula, literals, index=None):
+    if index is None:
+        index = OccurrenceIndex(formula)
+    return index.sort_by_dependencies(literals)
 
-    sorted_dependencies = sorted(dependencies_list, key=lambda x: x[1], reverse=True)
-    result = [item[0] for item in sorted_dependencies]
 
-    return result
+def factor_out_clauses(clauses, literals, method):
+    # The clauses are indexed once, for both the literal sort and the split
+    formula = And(*clauses)
+    index = OccurrenceIndex(formula)
+    if method == "occurrences":
+        sorted_literals = extract_literals_on_occurrences(formula, literals, index)
+    else:
+        sorted_literals = extract_literals_on_dependencies(formula, literals, index)
+    return factor_out(formula, sorted_literals, method, index)
 
 
 def combine_results(
@@ -61,30 +46,41 @@ def combine_results(
     return combined_result
 
 
-def factor_out(formula, literals, method):
+def factor_out(formula, literals, method, index=None):
     positive_factors = []
     negative_factors = []
     unprocessed_clauses = []
     if not literals:
         return formula
     literal = literals.pop(0)
+    negated_literal = Not(literal)
+    if index is None:
+        index = OccurrenceIndex(formula)
+    positive_clauses = set(index.positive.get(literal, ()))
+    negative_clauses = set(index.negative.get(literal, ()))
 
-    for clause in formula.ordered_children:
+    for clause_index, clause in enumerate(formula.ordered_children):
         if (
-            literal in clause.children
+            clause_index in positive_clauses
             and len(clause.children) > 1
             and len(literals) >= 1
         ):
             positive_factors.append(
-                Or(*(term for term in clause.ordered_children if term != literal))
+                Or(*(term for term in clause.ordered_children if term is not literal))
             )
         elif (
-            Not(literal) in clause.children
+            clause_index in negative_clauses
             and len(clause.children) > 1
             and len(literals) >= 1
         ):
             negative_factors.append(
-                Or(*(term for term in clause.ordered_children if term != Not(literal)))
+                Or(
+                    *(
+                        term
+                        for term in clause.ordered_children
+                        if term is not negated_literal
+                    )
+                )
             )
         else:
             unprocessed_clauses.append(clause)
@@ -95,37 +91,15 @@ def factor_out(formula, literals, method):
         positive_result = Or(literal, positive_factors[0])
     else:
         positive_result = Or(
-            literal,
-            factor_out(
-                And(*positive_factors),
-                (
-                    extract_literals_on_occurrences(And(*positive_factors), literals)
-                    if method == "occurrences"
-                    else extract_literals_on_dependencies(
-                        And(*positive_factors), literals
-                    )
-                ),
-                method,
-            ),
+            literal, factor_out_clauses(positive_factors, literals, method)
         )
     if not negative_factors:
         negative_result = None
     elif len(negative_factors) < 2:
-        negative_result = Or(Not(literal), negative_factors[0])
+        negative_result = Or(negated_literal, negative_factors[0])
     else:
         negative_result = Or(
-            Not(literal),
-            factor_out(
-                And(*negative_factors),
-                (
-                    extract_literals_on_occurrences(And(*negative_factors), literals)
-                    if method == "occurrences"
-                    else extract_literals_on_dependencies(
-                        And(*positive_factors), literals
-                    )
-                ),
-                method,
-            ),
+            negated_literal, factor_out_clauses(negative_factors, literals, method)
         )
 
     if not unprocessed_clauses:
@@ -133,15 +107,7 @@ def factor_out(formula, literals, method):
     elif len(unprocessed_clauses) < 2:
         unprocessed_result = Or(unprocessed_clauses[0])
     else:
-        unprocessed_result = factor_out(
-            And(*unprocessed_clauses),
-            (
-                extract_literals_on_occurrences(And(*unprocessed_clauses), literals)
-                if method == "occurrences"
-                else extract_literals_on_dependencies(And(*positive_factors), literals)
-            ),
-            method,
-        )
+        unprocessed_result = factor_out_clauses(unprocessed_clauses, literals, method)
 
     final_formula = combine_results(
         positive_result, negative_result, unprocessed_result
@@ -152,15 +118,16 @@ def factor_out(formula, literals, method):
 
 def cnf2bc(cnf_formula, factor_out_method):
     literals = cnf_formula.extract_variables()
+    index = OccurrenceIndex(cnf_formula)
     if factor_out_method == "dependencies":
-        sorted_literals = extract_literals_on_dependencies(cnf_formula, literals)
+        sorted_literals = extract_literals_on_dependencies(cnf_formula, literals, index)
         sorted_copy = sorted_literals.copy()
     else:
-        sorted_literals = extract_literals_on_occurrences(cnf_formula, literals)
+        sorted_literals = extract_literals_on_occurrences(cnf_formula, literals, index)
         sorted_copy = sorted_literals.copy()
         factor_out_method = "occurrences"
 
-    formula = factor_out(cnf_formula, sorted_literals, factor_out_method)
+    formula = factor_out(cnf_formula, sorted_literals, factor_out_method, index)
     circuit = CustomCircuit()
     [circuit.add(f"var_{var}", node_type="input") for var in sorted_copy]
 
@@ -1,8 +1,9 @@
+from meta.cnf import clause_literals
 from meta.hypergraph import Hypergraph
 
 
-def cnf2hypergraph(cnf_formula):
-    hypergraph = Hypergraph()
+def cnf2hypergraph(cnf_formula, hypergraph_class=Hypergraph):
+    hypergraph = hypergraph_class()
 
     if isinstance(cnf_formula, list):
         existing_edges = set()
@@ -27,11 +28,11 @@ def cnf2hypergraph(cnf_formula):
     literals = cnf_formula.extract_variables()
     hypergraph.add_nodes(literals)
 
-    for edge_name, hyperedge in enumerate(cnf_formula.ordered_children, 1):
-        if len(hyperedge.extract_variables()) < 2:
+    for edge_name, (edge, _, _) in enumerate(clause_literals(cnf_formula), 1):
+        if len(edge) < 2:
             continue
-        if hypergraph.has_hyperedge(tuple(hyperedge.extract_variables())):
+        if hypergraph.has_hyperedge(edge):
             continue
-        hypergraph.add_hyperedge(tuple(hyperedge.extract_variables()), f"e{edge_name}")
+        hypergraph.add_hyperedge(edge, f"e{edge_name}")
 
     return hypergraph
@@ -3,7 +3,7 @@ import time
 
 from dd import cudd
 
-from meta.circuit import CustomCircuit
+from meta.circuit import GATE_TYPES, ArrayCircuit
 from meta.formula import Not
 
 
@@ -17,6 +17,13 @@ def count_satisfying_assignments(bdd, roots):
 
 
 def build_bdd_from_circuit(circuit, var_order):
+    """Build the BDDs of the outputs of a circuit.
+
+    Every gate is built exactly once, in the topological order of the array
+    circuit, from the BDDs of its fanins. The roots are the BDDs of the
+    outputs by fanin depth, and then in definition order.
+    """
+    circuit = ArrayCircuit.from_circuit(circuit)
     bdd = cudd.BDD(memory_estimate=1024**3)
     bdd.configure(
         reordering=False,
@@ -24,8 +31,6 @@ def build_bdd_from_circuit(circuit, var_order):
         max_memory=1024**3,
     )
     bdd.declare(*var_order)
-    gate_nodes = {}
-    roots = []
 
     # Mapping of gate types to BDD operations
     gate_to_op = {
@@ -33,6 +38,8 @@ def build_bdd_from_circuit(circuit, var_order):
         "or": lambda *args: and_or_operation("or", args),
         "nand": lambda *args: bdd.apply("not", and_or_operation("and", args)),
         "nor": lambda *args: bdd.apply("not", and_or_operation("or", args)),
+        "0": lambda: bdd.false,
+        "1": lambda: bdd.true,
     }
 
     def and_or_operation(op, args):
@@ -46,67 +53,61 @@ def build_bdd_from_circuit(circuit, var_order):
             node = args[0]
         return node
 
-    # Traverse the Boolean circuit level by level
-    max_depth = max(circuit.fanout_depth(node) for node in circuit.inputs())
-    for level in range(max_depth + 1):
-        for node in CustomCircuit.get_gates(circuit):
-            if circuit.fanin_depth(node) == level and node not in circuit.inputs():
-                node_instance = circuit.graph.nodes.get(node)
-                fanin_nodes = []
-
-                for name in CustomCircuit.get_ordered_fanin(circuit, node):
-                    if name in circuit.inputs():
-                        fanin_nodes.append(bdd.var(name))
-                    else:
-                        bdd_node = gate_nodes[name]
-                        fanin_nodes.append(bdd_node)
-
-                if node_instance["type"] == "buf":
-                    gate_nodes[node] = fanin_nodes[0]
-                    bdd_node = gate_nodes[node]
-                elif node not in gate_nodes:
-                    remaining_args = fanin_nodes
-                    bdd_node = None
-
-                    while remaining_args:
-                        if len(remaining_args) > 2:
-                            args_to_apply = remaining_args[:2]
-                            remaining_args = remaining_args[2:]
-                        else:
-                            args_to_apply = remaining_args
-                            remaining_args = []
-
-                        op = node_instance["type"]
-                        Function_u = args_to_apply[0]
-                        Function_v = (
-                            args_to_apply[1] if len(args_to_apply) >= 2 else None
-                        )
-
-                        bdd_op = gate_to_op.get(op)
-
-                        if bdd_node is None:
-                            if callable(bdd_op):
-                                bdd_node = bdd_op(*(args_to_apply + remaining_args))
-                                remaining_args = []
-                            else:
-                                bdd_node = bdd.apply(op, Function_u, Function_v)
-                        else:
-                            bdd_node = bdd.apply(op, bdd_node, Function_u)
-                            if Function_v:
-                                bdd_node = bdd.apply(op, bdd_node, Function_v)
-
-                    gate_nodes[node] = bdd_node
-                else:
-                    bdd_node = gate_nodes[node]
-
-                gate_nodes[node] = bdd_node
-                if node_instance["output"] is True:
-                    roots.append(gate_nodes[node])
+    names = circuit.names
+    types = circuit.types.tolist()
+    fanins, starts = circuit.fanins.tolist(), circuit.fanin_offsets.tolist()
+    gate_nodes = [None] * len(circuit)
+    # Inputs missing from the variable order are only an error once used
+    undeclared = set()
+    for node in circuit.topological_order.tolist():
+        op = GATE_TYPES[types[node]]
+        if op == "input":
+            if names[node] in bdd.vars:
+                gate_nodes[node] = bdd.var(names[node])
+            else:
+                undeclared.add(node)
+            continue
+        node_fanins = fanins[starts[node] : starts[node + 1]]
+        used = undeclared.intersection(node_fanins) if undeclared else None
+        if used:
+            raise ValueError(
+                f'undeclared variable "{names[min(used)]}" used by gate '
+                f'"{names[node]}", the declared variables are: {sorted(bdd.vars)}'
+            )
+        fanin_nodes = [gate_nodes[fanin] for fanin in node_fanins]
+        if op == "buf":
+            gate_nodes[node] = fanin_nodes[0]
+        elif op in gate_to_op:
+            gate_nodes[node] = gate_to_op[op](*fanin_nodes)
+        else:
+            # Other gates, like not and xor, are folded over their fanins
+            bdd_node = bdd.apply(
+                op, fanin_nodes[0], fanin_nodes[1] if len(fanin_nodes) > 1 else None
+            )
+            for fanin_node in fanin_nodes[2:]:
+                bdd_node = bdd.apply(op, bdd_node, fanin_node)
+            gate_nodes[node] = bdd_node
+
+    depths = circuit.fanin_depths.tolist()
+    outputs = sorted(
+        (
+            node
+            for node in circuit.output_ids.tolist()
+            if GATE_TYPES[types[node]] != "input"
+        ),
+        key=lambda node: (depths[node], node),
+    )
+    roots = [gate_nodes[node] for node in outputs]
 
     return bdd, roots
 
 
-def build_bdd_from_formula(formula, var_order):
+def build_bdd_from_formula(formula, var_order, clause_order=None):
+    """Build the BDD of a CNF/DNF formula by combining its clauses one by one.
+
+    The clauses are combined in input order, or in the given clause order
+    (a permutation of the clause indices) if one is passed.
+    """
     formula_type = "CNF"
     if formula.is_dnf():
         formula_type = "DNF"
@@ -171,8 +172,14 @@ def build_bdd_from_formula(formula, var_order):
                 args = []
         return clause_node
 
-    node = handle_clause(formula.ordered_children[0])
-    for child in formula.ordered_children[1:]:
+    clauses = formula.ordered_children
+    if clause_order is not None:
+        if sorted(clause_order) != list(range(len(clauses))):
+            raise ValueError("The clause order is not a permutation of the clauses.")
+        clauses = [clauses[index] for index in clause_order]
+
+    node = handle_clause(clauses[0])
+    for child in clauses[1:]:
         clause_node = handle_clause(child)
         node = bdd.apply("and" if formula_type == "CNF" else "or", node, clause_node)
 
@@ -180,7 +187,9 @@ def build_bdd_from_formula(formula, var_order):
     return bdd, roots
 
 
-def create_bdd(input_format, formula, var_order, dump=False, bc_circuit=None):
+def create_bdd(
+    input_format, formula, var_order, dump=False, bc_circuit=None, clause_order=None
+):
     # Create BDD with CuDD
     bdd_creation_time_start = time.perf_counter()
     if input_format in ["bc", "v"]:
@@ -188,7 +197,7 @@ def create_bdd(input_format, formula, var_order, dump=False, bc_circuit=None):
     elif bc_circuit:
         bdd, roots = build_bdd_from_circuit(bc_circuit, var_order)
     else:
-        bdd, roots = build_bdd_from_formula(formula, var_order)
+        bdd, roots = build_bdd_from_formula(formula, var_order, clause_order)
 
     bdd_creation_time = time.perf_counter() - bdd_creation_time_start
     # bdd_satisfying_assignments = count_satisfying_assignments(bdd, roots)
@@ -0,0 +1,134 @@
+import contextlib
+import hashlib
+import os
+import parser
+import pickle
+import tempfile
+
+from meta.circuit import CustomCircuit
+from meta.cnf import CNFFormula
+
+DEFAULT_CACHE_DIR = os.environ.get("PARSE_CACHE_DIR", ".parse_cache")
+DEFAULT_MAX_BYTES = 512 * 1024**2
+ENTRY_SUFFIX = ".pcache"
+
+
+def _encode(input_format, formula):
+    """Convert a parsed input into a compact, picklable payload."""
+    if input_format == "cnf":
+        return formula.store
+    if input_format in ["bc", "v"]:
+        return formula.name, formula.graph, formula.blackboxes
+    return formula
+
+
+def _decode(input_format, payload):
+    """Rebuild a parsed input from its cached payload."""
+    if input_format == "cnf":
+        return CNFFormula(payload)
+    if input_format in ["bc", "v"]:
+        name, graph, blackboxes = payload
+        return CustomCircuit(name=name, graph=graph, blackboxes=blackboxes)
+    return payload
+
+
+class ParseCache:
+    """On-disk cache of parsed input files.
+
+    Entries are keyed by a hash of the file content and the parser version,
+    and the least recently used entries are evicted once the cache grows
+    beyond ``max_bytes``.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, path):
+        """Return the cache key of the file at the given path."""
+        digest = hashlib.blake2b(digest_size=20)
+        is_verilog = parser.strip_compression_suffix(path).endswith(".v")
+        digest.update(f"{parser.PARSER_VERSION}:{is_verilog}:".encode())
+        with open(path, "rb") as fp:
+            for chunk in iter(lambda: fp.read(1024**2), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Return the cached (format, formula) pair, or None on a miss."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as fp:
+                input_format, payload = pickle.load(fp)
+            formula = _decode(input_format, payload)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A corrupt or outdated entry is treated as a miss
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(entry_path)
+            return None
+        # Mark the entry as recently used, unless another process evicted it
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(entry_path)
+        return input_format, formula
+
+    def put(self, key, input_format, formula):
+        """Store a parsed input, evicting old entries if necessary.
+
+        Inputs that cannot be pickled or written are simply not cached.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump(
+                    (input_format, _encode(input_format, formula)),
+                    fp,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temp_path, self._entry_path(key))
+        except BaseException as error:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+            # Very deeply nested or unpicklable sentences and failed writes
+            # are not cached, the parse itself succeeded
+            if isinstance(
+                error, (RecursionError, pickle.PicklingError, TypeError, OSError)
+            ):
+                return
+            raise
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(ENTRY_SUFFIX):
+                # Entries may be evicted by another process at the same time
+                with contextlib.suppress(FileNotFoundError):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    entries.append((stat.st_mtime, stat.st_size, name))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(self.directory, name))
+            total_size -= size
+
+    def load(self, path):
+        """Load a file like parser.load, skipping parsing on a cache hit."""
+        key = self.key(path)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        input_format, formula = parser.load(path)
+        self.put(key, input_format, formula)
+        return input_format, formula
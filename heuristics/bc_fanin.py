@@ -1,75 +1,59 @@
-from meta.circuit import CustomCircuit
+from meta.circuit import ArrayCircuit
 
 
-def initialize_visited(circuit):
-    """Initialize 'visited' property for each node in the circuit."""
-    for node in circuit.graph.nodes:
-        circuit.graph.nodes[node]["visited"] = False
+def calculate_order(circuit):
+    """Order the inputs by a depth-first search from the outputs.
 
-    circuit.output_gates = CustomCircuit.get_ordered_outputs(circuit)
-
-    circuit.output_gate = next(iter(circuit.output_gates))
-
-    if not circuit.output_gates:
+    The fanins of every gate are visited from the deepest on, inputs of equal
+    depth in input order. With several outputs, the search starts
+    from an imaginary gate with all outputs as its fanins. The search keeps an
+    explicit stack and its own visited flags, so the circuit is not modified.
+    Return the ids of the ordered inputs.
+    """
+    circuit = ArrayCircuit.from_circuit(circuit)
+    outputs = circuit.output_ids.tolist()
+    if not outputs:
         raise ValueError("Output gates are not defined.")
 
-    if len(circuit.output_gates) > 1:
-        circuit.add("imaginary_output", "and", fanin=circuit.output_gates, output=True)
-        circuit.output_gate = "imaginary_output"
-
-
-def mark_visited(circuit, node):
-    """Mark a node as visited."""
-    circuit.graph.nodes.get(node)["visited"] = True
-
+    input_index = {node: idx for idx, node in enumerate(circuit.input_ids.tolist())}
+    depths = circuit.fanin_depths.tolist()
+    fanins, starts = circuit.fanins.tolist(), circuit.fanin_offsets.tolist()
 
-def is_visited(circuit, node):
-    """Check if a node has been visited."""
-    return circuit.graph.nodes.get(node)["visited"]
-
-
-def calculate_order(circuit, node=None, order=None):
-    # Initially, the output node should be the place to start from
-    if order is None:
-        order = []
-    if node is None:
-        initialize_visited(circuit)
-        node = circuit.output_gate
-    inputs = CustomCircuit.get_ordered_inputs(circuit)
-    mark_visited(circuit, node)
-
-    if node in inputs:
-        # Only add the node to order if it's an input node
-        if node not in order:
-            order.append(node)
-    else:
-        predecessors = circuit.graph._pred[node]
-        # Sort predecessors by fanin depth primarily and input order secondarily
-        sorted_predecessors = sorted(
-            predecessors,
-            key=lambda x: (
-                circuit.fanin_depth(x),
-                -inputs.index(x) if x in inputs else float("inf"),
-            ),
+    def sorted_fanins(nodes):
+        # Sort by fanin depth primarily and input order secondarily
+        return sorted(
+            nodes,
+            key=lambda x: (depths[x], -input_index.get(x, -float("inf"))),
             reverse=True,
         )
 
-        for w in sorted_predecessors:
-            if not is_visited(circuit, w):
-                calculate_order(circuit, w, order)
-
-        return order
+    visited = bytearray(len(circuit))
+    order = []
+    stack = [iter(sorted_fanins(outputs) if len(outputs) > 1 else outputs)]
+    while stack:
+        for node in stack[-1]:
+            if not visited[node]:
+                visited[node] = True
+                if node in input_index:
+                    order.append(node)
+                else:
+                    stack.append(
+                        iter(sorted_fanins(fanins[starts[node] : starts[node + 1]]))
+                    )
+                break
+        else:
+            stack.pop()
+
+    return order
 
 
 def calculate(circuit):
+    circuit = ArrayCircuit.from_circuit(circuit)
     order = calculate_order(circuit)
 
-    inputs = CustomCircuit.get_ordered_inputs(circuit)
-    for input_node in inputs:
-        if input_node not in order:
-            order.append(input_node)
-
-    circuit.remove("imaginary_output")
+    ordered = set(order)
+    order.extend(node for node in circuit.input_ids.tolist() if node not in ordered)
+    order = [circuit.names[node] for node in order]
 
     result_string = " < ".join(map(str, order))
 
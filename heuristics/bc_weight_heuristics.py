@@ -1,19 +1,20 @@
-from meta.circuit import CustomCircuit
+from meta.circuit import ArrayCircuit
 
 
 def calculate(circuit):
-    inputs = CustomCircuit.get_ordered_inputs(circuit)
-    circuit.output_gates = CustomCircuit.get_ordered_outputs(circuit)
-    input_weights = {input_var: 0 for input_var in inputs}
+    circuit = ArrayCircuit.from_circuit(circuit)
+    inputs = circuit.input_ids.tolist()
 
-    # Iterate through the input gates in the circuit
-    for node in inputs:
-        input_weights[node] = len(circuit.transitive_fanout(node))
+    # The weight of an input is the size of its transitive fanout
+    cone_sizes, _ = circuit.fanout_cones(inputs, circuit.output_ids.tolist())
+    input_weights = dict(zip(inputs, cone_sizes))
 
     # print("Final input weights:", input_weights)
 
     # Sort the input variables by weights primarily and input order secondarily
-    sorted_inputs = sorted(inputs, key=lambda x: (-input_weights[x], inputs.index(x)))
+    sorted_inputs = [
+        circuit.names[node] for node in sorted(inputs, key=lambda x: -input_weights[x])
+    ]
 
     # Create a result string based on the sorted input variables
     result_string = " < ".join(map(str, sorted_inputs))
@@ -0,0 +1,28 @@
+from meta.formula import Variable
+
+
+def calculate(formula):
+    store = getattr(formula, "store", None)
+    if store is None or store.variable_order is None:
+        print("No embedded variable order found, using the input order.")
+        if store is None:
+            result_list = list(formula.extract_variables())
+        else:
+            result_list = [Variable(var) for var in store.variables()]
+        result_string = " < ".join(map(str, result_list))
+        return result_string, result_list
+
+    # Only keep the variables that occur in the clauses, and append the ones
+    # the embedded order misses in input order
+    variables = store.variables()
+    occurring = set(variables)
+    order = list(
+        dict.fromkeys(var for var in store.variable_order.tolist() if var in occurring)
+    )
+    ordered = set(order)
+    order.extend(var for var in variables if var not in ordered)
+
+    result_list = [Variable(var) for var in order]
+    result_string = " < ".join(map(str, result_list))
+
+    return result_string, result_list
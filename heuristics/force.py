@@ -1,27 +1,42 @@
+import itertools
 import math
 import random
+import time
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from parser import ParserWarning
 
+import numpy as np
+
 from helpers.cnf2hypergraph import cnf2hypergraph
+from meta.csr_hypergraph import CSRHypergraph, gather_pins
 from meta.formula import Formula
 from meta.hypergraph import Hypergraph
 
-# Named tuple for VarInfo
-VarInfo = namedtuple("VarInfo", ["sum_cog", "num_occurs"])
-
+# Multilevel FORCE stops coarsening at this many nodes
+COARSEST_SIZE = 100
+# Number of FORCE passes refining the projected order at every level
+REFINE_ITERATIONS = 3
+# Larger hyperedges do not contribute to the heavy-edge matching ratings
+MAX_RATED_EDGE_SIZE = 16
 
-def compute_sum_of_spans(graph, idx_of_var):
-    sum_spans = 0
-    for edge in graph.hyperedges():
-        if not edge:
-            continue
-        indices = [idx_of_var[var] for var in edge]
-        sum_spans += max(indices) - min(indices)
-    return sum_spans
+# Named tuple for the outcome of one start of a multi-start run
+StartResult = namedtuple(
+    "StartResult", ["start", "seed", "sum_spans", "iterations", "seconds"]
+)
 
 
-def calculate(formula, method=None):
+def calculate(
+    formula,
+    method=None,
+    starts=1,
+    workers=None,
+    time_budget=None,
+    seed=None,
+    max_iterations=None,
+    tolerance=0.0,
+    patience=1,
+):
     transform = False
     if isinstance(method, list):
         method = method[0]
@@ -31,49 +46,334 @@ def calculate(formula, method=None):
         and (formula.is_cnf() or formula.is_dnf())
         or transform
     ):
-        hypergraph = cnf2hypergraph(formula)
-    elif isinstance(formula, Hypergraph):
+        hypergraph = cnf2hypergraph(formula, CSRHypergraph)
+    elif isinstance(formula, (Hypergraph, CSRHypergraph)):
         hypergraph = formula
     else:
         raise ParserWarning("Unknown formula input for FORCE algorithm.")
     hypergraph_list = list(hypergraph.nodes())
     if method == "random":
-        random.shuffle(hypergraph_list)
+        if seed is None:
+            random.shuffle(hypergraph_list)
+        else:
+            random.Random(seed).shuffle(hypergraph_list)
+    multilevel = method == "multilevel"
 
-    result = execute_with_order(hypergraph, hypergraph_list)
+    result, start_results = execute_multi_start(
+        hypergraph,
+        hypergraph_list,
+        starts,
+        workers,
+        time_budget,
+        seed,
+        max_iterations,
+        tolerance,
+        patience,
+        multilevel,
+    )
+    name = "Multilevel FORCE" if multilevel else "FORCE"
+    for start_result in start_results:
+        print(
+            f"{name} start {start_result.start} (seed {start_result.seed}): "
+            f"total span {start_result.sum_spans} after "
+            f"{start_result.iterations} iterations in "
+            f"{start_result.seconds:.3f} seconds"
+        )
     result_string = " < ".join(map(lambda x: str(x), result))
     return result_string, result
 
 
-def execute_with_order(graph, var_of_idx):
-    num_vars = len(var_of_idx)
-    idx_of_var = {var: idx for idx, var in enumerate(var_of_idx)}
+def incidence_arrays(graph):
+    """Return the nodes, and the pins and offsets of the non-empty hyperedges."""
+    nodes = graph.nodes()
+    if isinstance(graph, CSRHypergraph):
+        pins, edge_offsets = graph.pins, graph.edge_offsets
+        sizes = np.diff(edge_offsets)
+        if not sizes.all():
+            edge_offsets = np.concatenate(([0], np.cumsum(sizes[sizes > 0])))
+        return nodes, pins, edge_offsets
+    id_of_node = {node: idx for idx, node in enumerate(nodes)}
+    edges = [edge for edge in graph.hyperedges() if edge]
+    pins = np.fromiter(
+        (id_of_node[node] for edge in edges for node in edge), dtype=np.int64
+    )
+    edge_offsets = np.zeros(len(edges) + 1, dtype=np.int64)
+    np.cumsum([len(edge) for edge in edges], out=edge_offsets[1:])
+    return nodes, pins, edge_offsets
+
 
-    best_sum_spans = compute_sum_of_spans(graph, idx_of_var)
-    best_order = list(var_of_idx)
+def force_order(
+    pins,
+    edge_offsets,
+    order,
+    num_iterations,
+    deadline=None,
+    tolerance=0.0,
+    patience=1,
+):
+    """Run FORCE from the given node ids, return the best order, its span and passes."""
+    order = np.asarray(order, dtype=np.int64)
+    num_vars = len(order)
+    if len(edge_offsets) < 2:
+        return order, 0, 0
+    starts = edge_offsets[:-1]
+    sizes = np.diff(edge_offsets)
+    edge_of_pin = np.repeat(np.arange(len(sizes)), sizes)
+    num_occurs = np.bincount(pins, minlength=num_vars)
+    node_offsets = np.zeros(num_vars + 1, dtype=np.int64)
+    np.cumsum(num_occurs, out=node_offsets[1:])
+    incident_edges = edge_of_pin[np.argsort(pins, kind="stable")]
+    positions = np.arange(num_vars)
+    idx_of_var = np.empty(num_vars, dtype=np.int64)
 
-    num_iterations = int(5 * math.log(num_vars))
+    def spans_of(edges):
+        edge_pins, edge_sizes = gather_pins(pins, edge_offsets, edges)
+        pin_idx = idx_of_var[edge_pins]
+        edge_starts = np.cumsum(edge_sizes) - edge_sizes
+        return np.maximum.reduceat(pin_idx, edge_starts) - np.minimum.reduceat(
+            pin_idx, edge_starts
+        )
 
-    for _ in range(num_iterations):
-        infos = [VarInfo(0.0, 0) for _ in range(num_vars)]
+    idx_of_var[order] = positions
+    pin_idx = idx_of_var[pins]
+    spans = np.maximum.reduceat(pin_idx, starts) - np.minimum.reduceat(pin_idx, starts)
+    sum_spans = best_sum_spans = int(spans.sum())
+    best_order = order
+    iterations = stalled = 0
 
-        for edge in graph.hyperedges():
-            cog_of_edge = sum(idx_of_var[var] for var in edge) / len(edge)
-            for var in edge:
-                var_idx = idx_of_var[var]
-                vi = infos[var_idx]
-                infos[var_idx] = VarInfo(vi.sum_cog + cog_of_edge, vi.num_occurs + 1)
+    while iterations < num_iterations:
+        if deadline is not None and time.time() >= deadline:
+            break
+        iterations += 1
+        cog_of_edge = np.add.reduceat(idx_of_var[pins], starts) / sizes
+        # bincount adds up the centers of gravity in hyperedge order, exactly
+        # like the sequential version, so ties are broken the same way
+        sum_cog = np.bincount(
+            pins, weights=cog_of_edge[edge_of_pin], minlength=num_vars
+        )
+        cog_of_var = np.zeros(num_vars)
+        np.divide(sum_cog, num_occurs, out=cog_of_var, where=num_occurs > 0)
 
-        cog_of_var = [
-            vi.sum_cog / vi.num_occurs if vi.num_occurs > 0 else 0.0 for vi in infos
-        ]
+        order = order[np.argsort(cog_of_var[order], kind="stable")]
+        previous_idx = idx_of_var.copy()
+        idx_of_var[order] = positions
+        moved = np.flatnonzero(idx_of_var != previous_idx)
+        if not len(moved):  # Fixed point, further passes change nothing
+            break
 
-        var_of_idx.sort(key=lambda x: cog_of_var[idx_of_var[x]])
-        idx_of_var = {var: idx for idx, var in enumerate(var_of_idx)}
+        # Only the spans of the hyperedges with a moved pin can change
+        is_changed = np.zeros(len(spans), dtype=bool)
+        is_changed[gather_pins(incident_edges, node_offsets, moved)[0]] = True
+        changed = np.flatnonzero(is_changed)
+        if len(changed):
+            changed_spans = spans_of(changed)
+            sum_spans += int(changed_spans.sum() - spans[changed].sum())
+            spans[changed] = changed_spans
 
-        sum_spans = compute_sum_of_spans(graph, idx_of_var)
+        previous_best = best_sum_spans
         if sum_spans < best_sum_spans:
             best_sum_spans = sum_spans
-            best_order = list(var_of_idx)
+            best_order = order
+        if previous_best - best_sum_spans < tolerance * previous_best:
+            stalled += 1
+            if stalled >= patience:
+                break
+        else:
+            stalled = 0
+
+    return best_order, best_sum_spans, iterations
+
+
+def exact_order(pins, edge_offsets, num_nodes):
+    """Return the order of the nodes with the lowest total span, by brute force."""
+    orders = np.array(
+        list(itertools.permutations(range(num_nodes))), dtype=np.int64
+    ).reshape(-1, num_nodes)
+    if len(edge_offsets) < 2:
+        return orders[0]
+    starts = edge_offsets[:-1]
+    pin_positions = np.argsort(orders, axis=1)[:, pins]
+    spans = np.maximum.reduceat(pin_positions, starts, axis=1) - np.minimum.reduceat(
+        pin_positions, starts, axis=1
+    )
+    return orders[np.argmin(spans.sum(axis=1))]
+
+
+def heavy_edge_matching(pins, edge_offsets, num_nodes):
+    """Match nodes pairwise along their heaviest connections, return their clusters."""
+    sizes = np.diff(edge_offsets)
+    pairs, ratings = [], []
+    for size in np.unique(sizes):
+        if size < 2 or size > MAX_RATED_EDGE_SIZE:
+            continue
+        starts = edge_offsets[:-1][sizes == size]
+        edge_pins = pins[starts[:, None] + np.arange(size)]
+        first, second = np.triu_indices(size, 1)
+        pairs.append(
+            np.sort(
+                np.stack(
+                    (edge_pins[:, first].ravel(), edge_pins[:, second].ravel()), 1
+                ),
+                axis=1,
+            )
+        )
+        ratings.append(np.full(len(pairs[-1]), 1 / (size - 1)))
+
+    cluster = np.arange(num_nodes)
+    if pairs:
+        keys = np.concatenate(pairs) @ np.array([num_nodes, 1])
+        keys, inverse = np.unique(keys, return_inverse=True)
+        weights = np.bincount(inverse, weights=np.concatenate(ratings))
+        by_rating = np.argsort(-weights, kind="stable")
+        firsts = (keys[by_rating] // num_nodes).tolist()
+        seconds = (keys[by_rating] % num_nodes).tolist()
+        matched = bytearray(num_nodes)
+        for first, second in zip(firsts, seconds):
+            if not matched[first] and not matched[second]:
+                matched[first] = matched[second] = True
+                cluster[second] = first
+    return np.unique(cluster, return_inverse=True)[1]
+
+
+def contract(pins, edge_offsets, cluster):
+    """Return the pins and offsets of the hypergraph with clustered nodes."""
+    sizes = np.diff(edge_offsets)
+    edge_of_pin = np.repeat(np.arange(len(sizes)), sizes)
+    coarse_pins = cluster[pins]
+    order = np.argsort(edge_of_pin * (int(cluster.max()) + 1) + coarse_pins)
+    coarse_pins, edge_of_pin = coarse_pins[order], edge_of_pin[order]
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = (coarse_pins[1:] != coarse_pins[:-1]) | (
+        edge_of_pin[1:] != edge_of_pin[:-1]
+    )
+    coarse_pins, edge_of_pin = coarse_pins[keep], edge_of_pin[keep]
+    coarse_sizes = np.bincount(edge_of_pin, minlength=len(sizes))
+    kept_edges = coarse_sizes >= 2
+    coarse_pins = coarse_pins[kept_edges[edge_of_pin]]
+    coarse_offsets = np.zeros(kept_edges.sum() + 1, dtype=np.int64)
+    np.cumsum(coarse_sizes[kept_edges], out=coarse_offsets[1:])
+    return coarse_pins, coarse_offsets
+
+
+def multilevel_order(
+    pins,
+    edge_offsets,
+    order,
+    num_iterations,
+    deadline=None,
+    tolerance=0.0,
+    patience=1,
+):
+    """Run multilevel FORCE from the given node ids, return the order, span, passes."""
+    order = np.asarray(order, dtype=np.int64)
+    levels = []
+    num_nodes = len(order)
+    while num_nodes > COARSEST_SIZE and len(edge_offsets) > 1:
+        cluster = heavy_edge_matching(pins, edge_offsets, num_nodes)
+        num_clusters = int(cluster.max()) + 1
+        if num_clusters > 0.9 * num_nodes:
+            break
+        levels.append((pins, edge_offsets, order, cluster))
+        pins, edge_offsets = contract(pins, edge_offsets, cluster)
+        # A cluster starts at the position of its earliest member
+        first_position = np.full(num_clusters, num_nodes)
+        np.minimum.at(first_position, cluster[order], np.arange(num_nodes))
+        order = np.argsort(first_position, kind="stable")
+        num_nodes = num_clusters
+
+    order, sum_spans, iterations = force_order(
+        pins, edge_offsets, order, num_iterations, deadline, tolerance, patience
+    )
+    for pins, edge_offsets, fine_order, cluster in reversed(levels):
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        start_position = np.empty(len(fine_order), dtype=np.int64)
+        start_position[fine_order] = np.arange(len(fine_order))
+        projected = np.lexsort((start_position, rank[cluster]))
+        order, sum_spans, refine_iterations = force_order(
+            pins,
+            edge_offsets,
+            projected,
+            REFINE_ITERATIONS,
+            deadline,
+            tolerance,
+            patience,
+        )
+        iterations += refine_iterations
+    return order, sum_spans, iterations
+
+
+_worker_arrays = None
+
+
+def _init_worker(pins, edge_offsets):
+    global _worker_arrays
+    _worker_arrays = (pins, edge_offsets)
+
+
+def _run_start(pins, edge_offsets, start, seed, order, multilevel, *schedule):
+    start_time = time.perf_counter()
+    if seed is not None:
+        order = np.random.default_rng(seed).permutation(order)
+    engine = multilevel_order if multilevel else force_order
+    best_order, sum_spans, iterations = engine(pins, edge_offsets, order, *schedule)
+    seconds = time.perf_counter() - start_time
+    return best_order, StartResult(start, seed, sum_spans, iterations, seconds)
+
+
+def _run_start_in_worker(*args):
+    return _run_start(*_worker_arrays, *args)
+
+
+def execute_multi_start(
+    graph,
+    var_of_idx,
+    starts,
+    workers=None,
+    time_budget=None,
+    seed=None,
+    max_iterations=None,
+    tolerance=0.0,
+    patience=1,
+    multilevel=False,
+):
+    """Run FORCE from several starting orders, return the best order and all results."""
+    nodes, pins, edge_offsets = incidence_arrays(graph)
+    id_of_node = {node: idx for idx, node in enumerate(nodes)}
+    order = np.array([id_of_node[var] for var in var_of_idx], dtype=np.int64)
+    if max_iterations is None:
+        max_iterations = int(5 * math.log(len(var_of_idx)))
+    deadline = None if time_budget is None else time.time() + time_budget
+
+    # The first start keeps the given order, the others are seeded permutations
+    seeds = np.random.SeedSequence(seed).generate_state(starts).tolist()
+    tasks = [
+        (
+            start,
+            seeds[start] if start else None,
+            order,
+            multilevel,
+            max_iterations,
+            deadline,
+            tolerance,
+            patience,
+        )
+        for start in range(starts)
+    ]
+    if workers == 1 or starts == 1:
+        results = [_run_start(pins, edge_offsets, *task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(pins, edge_offsets),
+        ) as executor:
+            futures = [executor.submit(_run_start_in_worker, *task) for task in tasks]
+            results = [future.result() for future in futures]
 
-    return best_order
+    best_order, _ = min(
+        results, key=lambda result: (result[1].sum_spans, result[1].start)
+    )
+    return [nodes[node] for node in best_order.tolist()], [
+        start_result for _, start_result in results
+    ]
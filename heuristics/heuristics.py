@@ -11,6 +11,7 @@ heuristics_cnf = {
     "mince": "heuristics.mince",
     "mince_manual": "heuristics.mince_manual",
     "force": "heuristics.force",
+    "embedded": "heuristics.embedded_order",
 }
 
 heuristics_sat = {"fanin": "heuristics.cnf_dependencies"}
@@ -1,4 +1,4 @@
-from meta.circuit import CustomCircuit
+from meta.circuit import ArrayCircuit
 
 
 def calculate(formula):
@@ -7,8 +7,8 @@ def calculate(formula):
     ):
         original_order = list(x for x in formula.extract_variables())
     else:
-        formula.output_gates = formula.outputs()
-        original_order = CustomCircuit.get_ordered_inputs(formula)
+        circuit = ArrayCircuit.from_circuit(formula)
+        original_order = [circuit.names[node] for node in circuit.input_ids]
 
     result_string = " < ".join(map(str, original_order))
     result_list = [variable for variable in original_order]
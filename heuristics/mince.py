@@ -1,110 +1,237 @@
+import copy
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from parser import ParserWarning
 
-import mtkahypar
+import numpy as np
 
 from helpers.cnf2hypergraph import cnf2hypergraph
+from heuristics import force
+from meta.csr_hypergraph import CSRHypergraph
 from meta.formula import Formula
 from meta.hypergraph import Hypergraph
 
+# Subproblems up to this many nodes are ordered as one task by a worker
+SUBTREE_SIZE = 2000
+# Leaves up to this many nodes are ordered by trying every permutation
+EXACT_LEAF_SIZE = 6
 
-def kahypar(hypergraph, nodes_mapping, method="DETERMINISTIC"):
-    if len(hypergraph.nodes()) == 1:  # If the hypergraph is fully vertex-ordered
-        return [hypergraph.nodes()[0]]
-
-    new_hypergraph, hyperedges = hypergraph.to_kahypar()
-    context = mtkahypar.Context()
-    preset_map = {
-        "DETERMINISTIC": mtkahypar.PresetType.DETERMINISTIC,
-        "DEFAULT": mtkahypar.PresetType.DEFAULT,
-    }
-    context.loadPreset(preset_map[method])
-    # In the following, we partition a hypergraph into two blocks
-    # with an allowed imbalance of 3% and optimize the connectivity metric
-    context.setPartitioningParameters(
-        2, 0.03, mtkahypar.Objective.KM1  # number of blocks  # imbalance parameter
-    )  # objective function
-    context.logging = False
-
-    partitioned_hg = new_hypergraph.partition(context=context)
-    hypergraph1_nodes = []
-    hypergraph2_nodes = []
-    hypergraph1_edges = []
-    hypergraph2_edges = []
-
-    for node in hypergraph.nodes():
-        if partitioned_hg.blockID(node) == 0:
-            hypergraph1_nodes.append(node)
-        elif partitioned_hg.blockID(node) == 1:
-            hypergraph2_nodes.append(node)
-    for edge in hyperedges:
-        edge_tuple = tuple(node for node in edge)
-        if all(node in hypergraph1_nodes for node in edge):
-            hypergraph1_edges.append(edge_tuple)
-        elif all(node in hypergraph2_nodes for node in edge):
-            hypergraph2_edges.append(edge_tuple)
-
-    hypergraph1_mapping, hypergraph2_mapping = {}, {}
-    original_mapping = {v: k for k, v in nodes_mapping.items()}
-    for idx, node in enumerate(hypergraph1_nodes):
-        original_node = original_mapping[node]
-        hypergraph1_mapping[original_node] = idx
-    for idx, node in enumerate(hypergraph2_nodes):
-        original_node = original_mapping[node]
-        hypergraph2_mapping[original_node] = idx
-    for edge_idx, edge in enumerate(hypergraph1_edges):
-        updated_edge = tuple(
-            hypergraph1_mapping[original_mapping[node]]
-            if node in original_mapping
-            else node
-            for node in edge
+# The mtkahypar thread pool can only be initialized once per process
+_thread_pool_size = None
+
+
+class Partitioner:
+    """mtkahypar runtime shared by all partition calls of a MINCE run."""
+
+    def __init__(self, method="DETERMINISTIC", threads=None, seed=None, epsilon=0.03):
+        self.method = method
+        self.threads = threads
+        self.seed = seed
+        self.epsilon = epsilon
+        self.seconds = []
+        self._contexts = {}
+
+    def worker_copy(self, workers=None):
+        """Return an unused copy of the partitioner for a pool of workers."""
+        partitioner = copy.copy(self)
+        if partitioner.threads is None:
+            cores = os.cpu_count() or 1
+            partitioner.threads = max(1, cores // (workers or cores))
+        partitioner.seconds = []
+        partitioner._contexts = {}
+        return partitioner
+
+    def context(self, num_blocks=2):
+        """Return the prepared context for the given number of blocks."""
+        import mtkahypar
+
+        global _thread_pool_size
+        if _thread_pool_size is None:
+            _thread_pool_size = self.threads or os.cpu_count()
+            mtkahypar.initializeThreadPool(_thread_pool_size)
+        if num_blocks not in self._contexts:
+            if not self._contexts and self.seed is not None:
+                mtkahypar.setSeed(self.seed)
+            context = mtkahypar.Context()
+            preset_map = {
+                "DETERMINISTIC": mtkahypar.PresetType.DETERMINISTIC,
+                "DEFAULT": mtkahypar.PresetType.DEFAULT,
+            }
+            context.loadPreset(preset_map[self.method])
+            # In the following, we partition a hypergraph into num_blocks blocks
+            # with an allowed imbalance of epsilon and optimize the connectivity
+            context.setPartitioningParameters(
+                num_blocks, self.epsilon, mtkahypar.Objective.KM1
+            )
+            context.logging = False
+            self._contexts[num_blocks] = context
+        return self._contexts[num_blocks]
+
+    def partition(self, num_nodes, pins, edge_offsets, num_blocks=2):
+        """Return the block of every node, partitioned into ``num_blocks`` blocks."""
+        context = self.context(num_blocks)
+        start_time = time.perf_counter()
+        blocks = self.partition_blocks(
+            context, num_nodes, pins, edge_offsets, num_blocks
+        )
+        self.seconds.append(time.perf_counter() - start_time)
+        if num_blocks > 2:
+            # The blocks are ordered like a leaf of the hypergraph of cut edges
+            block_order = order_leaf(
+                num_blocks, *force.contract(pins, edge_offsets, blocks)
+            )
+            position = np.empty(num_blocks, dtype=np.int64)
+            position[block_order] = np.arange(num_blocks)
+            blocks = position[blocks]
+        return blocks
+
+    def partition_blocks(self, context, num_nodes, pins, edge_offsets, num_blocks=2):
+        """Return the block of every node, as numbered by mtkahypar."""
+        import mtkahypar
+
+        pin_list = pins.tolist()
+        offset_list = edge_offsets.tolist()
+        new_hypergraph = mtkahypar.Hypergraph(
+            num_hypernodes=num_nodes,
+            num_hyperedges=len(offset_list) - 1,
+            hyperedges=[
+                pin_list[start:end] for start, end in zip(offset_list, offset_list[1:])
+            ],
         )
-        hypergraph1_edges[edge_idx] = updated_edge
-    for edge_idx, edge in enumerate(hypergraph2_edges):
-        updated_edge = tuple(
-            hypergraph2_mapping[original_mapping[node]]
-            if node in original_mapping
-            else node
-            for node in edge
+        partitioned_hg = new_hypergraph.partition(context=context)
+        # The block IDs are read once, all further bookkeeping is on the array
+        return np.fromiter(
+            map(partitioned_hg.blockID, range(num_nodes)),
+            dtype=np.int64,
+            count=num_nodes,
         )
-        hypergraph2_edges[edge_idx] = updated_edge
-    hypergraph1_nodes = [
-        hypergraph1_mapping[original_mapping[node]]
-        if node in original_mapping
-        else node
-        for node in hypergraph1_nodes
-    ]
-    hypergraph2_nodes = [
-        hypergraph2_mapping[original_mapping[node]]
-        if node in original_mapping
-        else node
-        for node in hypergraph2_nodes
-    ]
-
-    hypergraph1 = Hypergraph(nodes_mapping=nodes_mapping)
-    hypergraph1.add_nodes(hypergraph1_nodes)
-    hypergraph1.add_hyperedges(hypergraph1_edges)
-
-    hypergraph2 = Hypergraph(nodes_mapping=nodes_mapping)
-    hypergraph2.add_nodes(hypergraph2_nodes)
-    hypergraph2.add_hyperedges(hypergraph2_edges)
-
-    subproblem_ordering_1 = kahypar(hypergraph1, nodes_mapping, method)
-    hypergraph1_mapping_reversed = {v: k for k, v in hypergraph1_mapping.items()}
-    subproblem_ordering_1 = [
-        nodes_mapping[hypergraph1_mapping_reversed[node]]
-        for node in subproblem_ordering_1
-    ]
-    subproblem_ordering_2 = kahypar(hypergraph2, nodes_mapping, method)
-    hypergraph2_mapping_reversed = {v: k for k, v in hypergraph2_mapping.items()}
-    subproblem_ordering_2 = [
-        nodes_mapping[hypergraph2_mapping_reversed[node]]
-        for node in subproblem_ordering_2
-    ]
-
-    return subproblem_ordering_1 + subproblem_ordering_2
-
-
-def calculate(formula, method="DETERMINISTIC"):
+
+
+def order_leaf(num_nodes, pins, edge_offsets):
+    """Order a subproblem below the leaf cutoff in process, exactly if it is small."""
+    sizes = np.diff(edge_offsets)
+    if not sizes.all():
+        edge_offsets = np.concatenate(([0], np.cumsum(sizes[sizes > 0])))
+    if num_nodes <= EXACT_LEAF_SIZE:
+        return force.exact_order(pins, edge_offsets, num_nodes)
+    order, _, _ = force.force_order(
+        pins, edge_offsets, np.arange(num_nodes), int(5 * math.log(num_nodes))
+    )
+    return order
+
+
+def is_leaf(view, leaf_size=1, leaf_edges=-1):
+    return view.num_nodes <= leaf_size or view.num_hyperedges <= leaf_edges
+
+
+def kahypar(view, partitioner, leaf_size=1, leaf_edges=-1, num_blocks=2):
+    """Order a view by recursive partitioning into ``num_blocks`` blocks."""
+    if view.num_nodes <= 1:  # If the hypergraph is fully vertex-ordered
+        return view.node_ids.tolist()
+    if is_leaf(view, leaf_size, leaf_edges):
+        node_ids = view.node_ids
+        node_ids[:] = node_ids[order_leaf(view.num_nodes, *view.local_arrays())]
+        return node_ids.tolist()
+
+    k = min(num_blocks, view.num_nodes)
+    blocks = partitioner.partition(view.num_nodes, *view.local_arrays(), k)
+    if blocks.min() == blocks.max():  # The partitioner could not split the nodes
+        return view.node_ids.tolist()
+
+    # The views share their parent's arrays, nothing is copied or relabelled
+    ordering = []
+    for subproblem in view.split(blocks, k):
+        ordering += kahypar(subproblem, partitioner, leaf_size, leaf_edges, num_blocks)
+    return ordering
+
+
+_worker_partitioner = None
+
+
+def _init_worker(partitioner):
+    global _worker_partitioner
+    _worker_partitioner = partitioner
+
+
+def _partition_in_worker(num_nodes, pins, edge_offsets, num_blocks):
+    blocks = _worker_partitioner.partition(num_nodes, pins, edge_offsets, num_blocks)
+    return blocks, _worker_partitioner.seconds.pop()
+
+
+def _order_subtree(num_nodes, pins, edge_offsets, *options):
+    hypergraph = CSRHypergraph.from_arrays(pins, edge_offsets, num_nodes)
+    order = kahypar(hypergraph.view(), _worker_partitioner, *options)
+    seconds, _worker_partitioner.seconds = _worker_partitioner.seconds, []
+    return order, seconds
+
+
+def parallel_kahypar(
+    view,
+    partitioner,
+    workers=None,
+    leaf_size=1,
+    leaf_edges=-1,
+    num_blocks=2,
+):
+    """Run the recursive partitioning of kahypar over a process pool."""
+    options = (leaf_size, leaf_edges, num_blocks)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        # A forked worker would inherit the dead threads of a started mtkahypar pool
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(partitioner.worker_copy(workers),),
+    ) as executor:
+        pending = {}
+
+        def submit(view):
+            if view.num_nodes <= 1:
+                return
+            k = min(num_blocks, view.num_nodes)
+            if view.num_nodes > SUBTREE_SIZE and not is_leaf(view, *options[:2]):
+                task, arguments = _partition_in_worker, (k,)
+            else:
+                task, arguments = _order_subtree, options
+            future = executor.submit(
+                task, view.num_nodes, *view.local_arrays(), *arguments
+            )
+            pending[future] = (view, task, k)
+
+        submit(view)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subproblem, task, k = pending.pop(future)
+                if task is _order_subtree:
+                    order, seconds = future.result()
+                    partitioner.seconds.extend(seconds)
+                    node_ids = subproblem.node_ids
+                    node_ids[:] = node_ids[order]
+                    continue
+                blocks, seconds = future.result()
+                partitioner.seconds.append(seconds)
+                if blocks.min() < blocks.max():
+                    for child in subproblem.split(blocks, k):
+                        submit(child)
+
+    return view.node_ids.tolist()
+
+
+def calculate(
+    formula,
+    method="DETERMINISTIC",
+    workers=1,
+    leaf_size=1,
+    leaf_edges=-1,
+    num_blocks=2,
+    threads=None,
+    seed=None,
+    epsilon=0.03,
+    partitioner=None,
+):
     transform = False
     if isinstance(method, list):
         method = method[0]
@@ -114,16 +241,34 @@ def calculate(formula, method="DETERMINISTIC"):
         and (formula.is_cnf() or formula.is_dnf())
         or transform
     ):
-        hypergraph = cnf2hypergraph(formula)
-    elif isinstance(formula, Hypergraph):
+        hypergraph = cnf2hypergraph(formula, CSRHypergraph)
+    elif isinstance(formula, CSRHypergraph):
         hypergraph = formula
+    elif isinstance(formula, Hypergraph):
+        hypergraph = CSRHypergraph()
+        hypergraph.add_nodes(formula.nodes())
+        hypergraph.add_hyperedges(formula.hyperedges())
     else:
         raise ParserWarning("Unknown formula input for MINCE algorithm.")
-    mapping = hypergraph.convert_nodes_to_integers()
-    mapping_reversed = {v: k for k, v in mapping.items()}
-    result_kahypar = kahypar(hypergraph, mapping, method)
-    result = [mapping_reversed[node] for node in result_kahypar]
+    if partitioner is None:
+        partitioner = Partitioner(method, threads, seed, epsilon)
+    first_call = len(partitioner.seconds)
+    nodes = hypergraph.nodes()
+    if workers == 1:
+        result_kahypar = kahypar(
+            hypergraph.view(), partitioner, leaf_size, leaf_edges, num_blocks
+        )
+    else:
+        result_kahypar = parallel_kahypar(
+            hypergraph.view(), partitioner, workers, leaf_size, leaf_edges, num_blocks
+        )
+    result = [nodes[node] for node in result_kahypar]
 
+    seconds = partitioner.seconds[first_call:]
+    print(
+        f"MINCE: {len(seconds)} mtkahypar calls in {sum(seconds):.3f} seconds"
+        + (f" (longest {max(seconds):.3f} seconds)" if seconds else "")
+    )
     result_string = " < ".join(map(lambda x: str(x), result))
     result_list = result
 
@@ -1,51 +1,156 @@
-from itertools import chain, combinations
+import random
 from parser import ParserWarning
 
 from helpers.cnf2hypergraph import cnf2hypergraph
 from meta.formula import Formula
 from meta.hypergraph import Hypergraph
 
-
-def calculate_hyperedge_cut(hypergraph, cut):
-    # Calculate the size of the hyperedge cut for the given cut
-    cut_size = 0
-    for edge in hypergraph.hyperedges():
-        if set(edge).intersection(cut) and not set(edge).issubset(cut):
-            cut_size += 1
-    return cut_size
+# Number of random balanced bisections FM is started from
+RESTARTS = 4
+# Maximum number of FM passes from every starting bisection
+MAX_PASSES = 10
 
 
-def is_balanced_cut(hypergraph, cut):
-    # Check if the given cut is a balanced cut
-    num_vertices = len(hypergraph.nodes())
-    return (1 / 3) * num_vertices <= len(cut) <= (2 / 3) * num_vertices
+def fm_bisection(edges, incident, sides, low, high):
+    """Improve a bisection with Fiduccia-Mattheyses passes.
 
-
-def powerset(iterable):
+    ``edges`` holds the node ids of every hyperedge, ``incident`` the
+    hyperedges of every node and ``sides`` the side (0 or 1) of every node,
+    which is updated in place. Every pass moves each node once, the node with
+    the highest gain first, and keeps the moves up to the lowest cut with
+    both sides between ``low`` and ``high`` nodes. Return the cut size.
     """
-    Generate the powerset of an iterable.
-    Only include subsets with length > 1/3 and <= 1/2 of the original set.
+    num_nodes = len(sides)
+    size = [sides.count(0), sides.count(1)]
+    counts = [[0, 0] for _ in edges]
+    for edge, pins in enumerate(edges):
+        for node in pins:
+            counts[edge][sides[node]] += 1
+    cut = sum(1 for count in counts if count[0] and count[1])
+    offset = max(map(len, incident), default=0)
+
+    for _ in range(MAX_PASSES):
+        gain = [0] * num_nodes
+        for node in range(num_nodes):
+            side = sides[node]
+            for edge in incident[node]:
+                gain[node] += (counts[edge][side] == 1) - (counts[edge][1 - side] == 0)
+        # Gain buckets of each side, indexed by gain + offset
+        buckets = [[{} for _ in range(2 * offset + 1)] for _ in range(2)]
+        top = [0, 0]
+        for node in range(num_nodes):
+            buckets[sides[node]][gain[node] + offset][node] = None
+            top[sides[node]] = max(top[sides[node]], gain[node] + offset)
+        locked = [False] * num_nodes
+
+        def update(node, delta):
+            if locked[node]:
+                return
+            side = sides[node]
+            del buckets[side][gain[node] + offset][node]
+            gain[node] += delta
+            buckets[side][gain[node] + offset][node] = None
+            top[side] = max(top[side], gain[node] + offset)
+
+        moves = []
+        best_cut, best_moves = cut, 0
+        while True:
+            candidates = []
+            for side in (0, 1):
+                # One node of slack lets the pass leave a tight balance
+                if size[side] < low or size[1 - side] > high:
+                    continue
+                while top[side] > 0 and not buckets[side][top[side]]:
+                    top[side] -= 1
+                if buckets[side][top[side]]:
+                    node = next(iter(buckets[side][top[side]]))
+                    candidates.append((-gain[node], -size[side], side, node))
+            if not candidates:
+                break
+            _, _, source, node = min(candidates)
+            target = 1 - source
+            del buckets[source][gain[node] + offset][node]
+            locked[node] = True
+            for edge in incident[node]:
+                count = counts[edge]
+                if count[target] == 0:
+                    for other in edges[edge]:
+                        update(other, 1)
+                elif count[target] == 1:
+                    for other in edges[edge]:
+                        if sides[other] == target:
+                            update(other, -1)
+                count[source] -= 1
+                count[target] += 1
+                if count[source] == 0:
+                    for other in edges[edge]:
+                        update(other, -1)
+                elif count[source] == 1:
+                    for other in edges[edge]:
+                        if other != node and sides[other] == source:
+                            update(other, 1)
+            sides[node] = target
+            size[source] -= 1
+            size[target] += 1
+            cut -= gain[node]
+            moves.append(node)
+            if cut < best_cut and low <= size[0] <= high and low <= size[1] <= high:
+                best_cut, best_moves = cut, len(moves)
+
+        # Undo the moves after the lowest cut of the pass
+        for node in moves[best_moves:]:
+            source = sides[node]
+            for edge in incident[node]:
+                counts[edge][source] -= 1
+                counts[edge][1 - source] += 1
+            sides[node] = 1 - source
+            size[source] -= 1
+            size[1 - source] += 1
+        cut = best_cut
+        if not best_moves:
+            break
+
+    return cut
+
+
+def balanced_mincut(hypergraph, restarts=RESTARTS, seed=0):
     """
-    s = list(iterable)
-    return chain.from_iterable(
-        combinations(s, r) for r in range(len(s) // 3, len(s) // 2 + 2)
-    )
-
+    Return the nodes of one side of a balanced bisection with a small cut.
 
-def balanced_mincut(hypergraph):
-    mincut = None
-    mincut_size = float("inf")
-
-    for node in hypergraph.nodes():
-        for cut in powerset(hypergraph.nodes()):
-            if node in cut:
-                continue  # Skip cuts that contain the node itself
-            cut_size = calculate_hyperedge_cut(hypergraph, cut)
-            if is_balanced_cut(hypergraph, cut) and cut_size < mincut_size:
-                mincut = cut
-                mincut_size = cut_size
-
-    return mincut
+    FM is run from ``restarts`` random balanced bisections, drawn with the
+    given seed, and the side without the first node of the best one is
+    returned in node order.
+    """
+    nodes = hypergraph.nodes()
+    num_nodes = len(nodes)
+    if num_nodes < 2:
+        return []
+    index = {node: idx for idx, node in enumerate(nodes)}
+    edges = []
+    incident = [[] for _ in nodes]
+    for edge in hypergraph.hyperedges():
+        pins = [index[node] for node in dict.fromkeys(hypergraph.links(edge))]
+        if len(pins) > 1:  # Single node hyperedges are never cut
+            for node in pins:
+                incident[node].append(len(edges))
+            edges.append(pins)
+    # Both sides need between a third and two thirds of the nodes
+    low, high = (num_nodes + 2) // 3, 2 * num_nodes // 3
+
+    rng = random.Random(seed)
+    best = None
+    for _ in range(restarts):
+        order = list(range(num_nodes))
+        rng.shuffle(order)
+        sides = [0] * num_nodes
+        for node in order[: num_nodes // 2]:
+            sides[node] = 1
+        cut = fm_bisection(edges, incident, sides, low, high)
+        if best is None or cut < best[0]:
+            best = cut, sides
+
+    sides = best[1]
+    return [node for node, side in zip(nodes, sides) if side != sides[0]]
 
 
 def mince(hypergraph):
@@ -58,17 +163,19 @@ def mince(hypergraph):
     subproblem_1 = Hypergraph()
     subproblem_2 = Hypergraph()
 
+    C_set = set(C)
     for node in C:
         subproblem_1.add_node(node)
     for edge in hypergraph.hyperedges():
-        if set(edge).issubset(set(C)):
+        if C_set.issuperset(edge):
             subproblem_1.add_hyperedge(edge)
 
-    not_C = [node for node in hypergraph.nodes() if node not in C]
+    not_C = [node for node in hypergraph.nodes() if node not in C_set]
+    not_C_set = set(not_C)
     for node in not_C:
         subproblem_2.add_node(node)
     for edge in hypergraph.hyperedges():
-        if set(edge).issubset(not_C):
+        if not_C_set.issuperset(edge):
             subproblem_2.add_hyperedge(edge)
 
     # Recursive calls to MINCE algorithm on subproblems
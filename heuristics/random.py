@@ -1,5 +1,7 @@
 import random
 
+from meta.circuit import ArrayCircuit
+
 
 def calculate(formula):
     if hasattr(formula, "extract_variables") and callable(
@@ -7,8 +9,8 @@ def calculate(formula):
     ):
         vars = list(formula.extract_variables())
     else:
-        vars = list(formula.inputs())
-        formula.output_gates = formula.outputs()
+        circuit = ArrayCircuit.from_circuit(formula)
+        vars = [circuit.names[node] for node in circuit.input_ids]
 
     random_order = random.sample(vars, len(vars))
     result_string = " < ".join(map(str, random_order))
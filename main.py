@@ -8,7 +8,9 @@ import time
 from helpers.bc2dnf import bc2dnf
 from helpers.cnf2bc import cnf2bc
 from helpers.cudd_helper import create_bdd
+from helpers.parse_cache import ParseCache
 from heuristics import heuristics
+from meta.circuit import ArrayCircuit
 
 
 class MyCLI(cmd.Cmd):
@@ -28,6 +30,7 @@ class MyCLI(cmd.Cmd):
     def __init__(self):
         super().__init__()
         self.current_directory = os.getcwd()
+        self.parse_cache = ParseCache()
 
     def do_list(self, filename):
         """List files and directories in the current directory."""
@@ -42,6 +45,16 @@ class MyCLI(cmd.Cmd):
         parse.add_argument("-dump", action="store_true", help="Dump BDDs to PNG files")
         parse.add_argument("-heuristic", help="Choose a specific heuristic")
         parse.add_argument("-transform", help="Choose a transformation process")
+        parse.add_argument(
+            "-clause_order",
+            action="store_true",
+            help="Conjoin the clauses in the order embedded in the input file",
+        )
+        parse.add_argument(
+            "-no_cache",
+            action="store_true",
+            help="Bypass the on-disk cache of parsed input files",
+        )
         parse.add_argument(
             "-factor_out",
             help="Choose a method for factoring out in transformation process",
@@ -50,9 +63,65 @@ class MyCLI(cmd.Cmd):
             "-method",
             help=(
                 "Choose a method for the MINCE mt-kahaypar algorithm, or FORCE initial"
-                " ordering."
+                " ordering (random) or variant (multilevel)."
             ),
         )
+        parse.add_argument(
+            "-starts",
+            type=int,
+            help="Number of FORCE starting orders to run, keeping the best one",
+        )
+        parse.add_argument(
+            "-workers",
+            type=int,
+            help="Number of processes for a multi-start FORCE or MINCE",
+        )
+        parse.add_argument(
+            "-leaf_size",
+            type=int,
+            help="Order MINCE subproblems of at most this many nodes in process",
+        )
+        parse.add_argument(
+            "-leaf_edges",
+            type=int,
+            help="Order MINCE subproblems of at most this many edges in process",
+        )
+        parse.add_argument(
+            "-num_blocks",
+            type=int,
+            help="Number of blocks MINCE splits every subproblem into, 2 by default",
+        )
+        parse.add_argument(
+            "-time_budget", type=float, help="Wall-clock budget of FORCE in seconds"
+        )
+        parse.add_argument(
+            "-seed",
+            type=int,
+            help="Master seed of the FORCE starting orders, or the mtkahypar seed",
+        )
+        parse.add_argument(
+            "-threads", type=int, help="Number of mtkahypar threads per process"
+        )
+        parse.add_argument(
+            "-epsilon",
+            type=float,
+            help="Allowed imbalance of the MINCE blocks, 0.03 by default",
+        )
+        parse.add_argument(
+            "-max_iterations",
+            type=int,
+            help="Maximum number of FORCE passes, 5 * ln(n) by default",
+        )
+        parse.add_argument(
+            "-tolerance",
+            type=float,
+            help="Relative span improvement below which a FORCE pass has stalled",
+        )
+        parse.add_argument(
+            "-patience",
+            type=int,
+            help="Number of stalled FORCE passes in a row before stopping",
+        )
 
         try:
             args = parse.parse_args(arg.split())
@@ -62,7 +131,10 @@ class MyCLI(cmd.Cmd):
         path = os.path.join(self.current_directory, "input_files", args.filename)
         start_time = time.perf_counter()
         try:
-            input_format, formula = parser.load(path)
+            if args.no_cache:
+                input_format, formula = parser.load(path)
+            else:
+                input_format, formula = self.parse_cache.load(path)
         except parser.ParserWarning as e:
             print(f"Warning: {e}. Please try again.")
             return
@@ -101,6 +173,10 @@ class MyCLI(cmd.Cmd):
                 print(f"Transformed from {input_format} to {args.transform}")
                 input_format = "cnf"
 
+        if input_format in ["bc", "v"]:
+            # The circuit heuristics and the BDD builder share one array circuit
+            formula = ArrayCircuit.from_circuit(formula)
+
         heuristic_options = heuristics.heuristics[input_format]
 
         if heuristic_type in heuristic_options:
@@ -117,12 +193,35 @@ class MyCLI(cmd.Cmd):
 
         start_ordering_time = time.perf_counter()
         heuristic_module = importlib.import_module(module_path)
+        heuristic_arguments = {}
         if args.method:
-            order_string, var_order = heuristic_module.calculate(
-                formula, method=args.method
-            )
-        else:
-            order_string, var_order = heuristic_module.calculate(formula)
+            heuristic_arguments["method"] = args.method
+        heuristic_option_names = {
+            "force": [
+                "starts",
+                "workers",
+                "time_budget",
+                "seed",
+                "max_iterations",
+                "tolerance",
+                "patience",
+            ],
+            "mince": [
+                "workers",
+                "leaf_size",
+                "leaf_edges",
+                "num_blocks",
+                "threads",
+                "seed",
+                "epsilon",
+            ],
+        }
+        for option in heuristic_option_names.get(heuristic_type, []):
+            if getattr(args, option) is not None:
+                heuristic_arguments[option] = getattr(args, option)
+        order_string, var_order = heuristic_module.calculate(
+            formula, **heuristic_arguments
+        )
 
         end_time = time.perf_counter()
         ordering_time = end_time - start_ordering_time
@@ -134,8 +233,21 @@ class MyCLI(cmd.Cmd):
             + " seconds."
         )
 
+        clause_order = None
+        if args.clause_order:
+            store = getattr(formula, "store", None)
+            if store is not None and store.clause_order is not None:
+                clause_order = store.clause_order.tolist()
+            else:
+                print("No embedded clause order found, using the input order.")
+
         bdd_info = create_bdd(
-            input_format, formula, var_order, dump=args.dump, bc_circuit=bc_circuit
+            input_format,
+            formula,
+            var_order,
+            dump=args.dump,
+            bc_circuit=bc_circuit,
+            clause_order=clause_order,
         )
 
         return {
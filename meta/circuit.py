@@ -1,26 +1,231 @@
 import circuitgraph as cg
+import numpy as np
 
 
 class CustomCircuit(cg.Circuit):
     def get_ordered_inputs(self):
         """Get inputs in the order they are defined in the file."""
-        nodes = self.graph.nodes
-        input_nodes = [node for node, data in nodes.items() if node in self.inputs()]
-        return input_nodes
+        inputs = self.inputs()
+        return [node for node in self.graph.nodes if node in inputs]
 
     def get_ordered_outputs(self):
         """Get outputs in the order they are defined in the file."""
-        nodes = self.graph.nodes
-        output_nodes = [node for node, data in nodes.items() if node in self.outputs()]
-        return output_nodes
+        outputs = self.outputs()
+        return [node for node in self.graph.nodes if node in outputs]
 
     def get_gates(self):
         """Get gates in the order they are defined in the file."""
-        nodes = self.graph.nodes
-        gates = [node for node, data in nodes.items() if node not in self.inputs()]
-        return gates
+        inputs = self.inputs()
+        return [node for node in self.graph.nodes if node not in inputs]
 
     def get_ordered_fanin(self, node):
-        nodes = self.graph.nodes
-        fanins = [fanin for fanin, data in nodes.items() if fanin in self.fanin(node)]
-        return fanins
+        """Get the fanins of a node in the order they are defined in the file."""
+        fanins = self.fanin(node)
+        return [fanin for fanin in self.graph.nodes if fanin in fanins]
+
+
+GATE_TYPES = (
+    "input",
+    "buf",
+    "not",
+    "and",
+    "nand",
+    "or",
+    "nor",
+    "xor",
+    "xnor",
+    "0",
+    "1",
+    "x",
+    "bb_input",
+    "bb_output",
+)
+GATE_CODES = {gate_type: code for code, gate_type in enumerate(GATE_TYPES)}
+
+
+class ArrayCircuit:
+    """Frozen circuit stored as integer arrays.
+
+    Nodes are numbered in definition order, ``names`` holding their names.
+    ``types`` holds the gate type of every node as an index into
+    ``GATE_TYPES``, and ``is_output`` marks the outputs. The fanins of node
+    ``n``, in definition order, are
+    ``fanins[fanin_offsets[n]:fanin_offsets[n + 1]]``, and its fanouts, in
+    node order, ``fanouts[fanout_offsets[n]:fanout_offsets[n + 1]]``.
+    ``topological_order`` lists every node after its fanins, and
+    ``fanin_depths`` and ``fanout_depths`` hold the length of the longest
+    path to a node from a node without fanin, and from it to a node without
+    fanout. All arrays are read-only.
+    """
+
+    __slots__ = (
+        "name",
+        "names",
+        "types",
+        "is_output",
+        "fanin_offsets",
+        "fanins",
+        "fanout_offsets",
+        "fanouts",
+        "topological_order",
+        "fanin_depths",
+        "fanout_depths",
+        "_node_ids",
+    )
+
+    def __init__(self, names, types, is_output, fanin_offsets, fanins, name=None):
+        num_nodes = len(names)
+        types = np.asarray(types, dtype=np.int8)
+        is_output = np.asarray(is_output, dtype=bool)
+        fanin_offsets = np.asarray(fanin_offsets, dtype=np.int64)
+        fanins = np.asarray(fanins, dtype=np.int64)
+
+        # Sorting the fanins stably by node gives every node's fanouts in order
+        fanout_order = np.argsort(fanins, kind="stable")
+        fanouts = np.repeat(np.arange(num_nodes), np.diff(fanin_offsets))
+        fanouts = fanouts[fanout_order]
+        fanout_offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(fanins, minlength=num_nodes), out=fanout_offsets[1:])
+
+        fanin_list, fanin_starts = fanins.tolist(), fanin_offsets.tolist()
+        fanout_list, fanout_starts = fanouts.tolist(), fanout_offsets.tolist()
+        remaining = np.diff(fanin_offsets).tolist()
+        order = [node for node in range(num_nodes) if not remaining[node]]
+        for node in order:  # Nodes are appended once all their fanins are
+            for fanout in fanout_list[fanout_starts[node] : fanout_starts[node + 1]]:
+                remaining[fanout] -= 1
+                if not remaining[fanout]:
+                    order.append(fanout)
+        if len(order) < num_nodes:
+            raise ValueError("Cannot sort a cyclic circuit")
+
+        fanin_depths = [0] * num_nodes
+        for node in order:
+            start, end = fanin_starts[node], fanin_starts[node + 1]
+            if start < end:
+                fanin_depths[node] = 1 + max(
+                    map(fanin_depths.__getitem__, fanin_list[start:end])
+                )
+        fanout_depths = [0] * num_nodes
+        for node in reversed(order):
+            start, end = fanout_starts[node], fanout_starts[node + 1]
+            if start < end:
+                fanout_depths[node] = 1 + max(
+                    map(fanout_depths.__getitem__, fanout_list[start:end])
+                )
+
+        arrays = {
+            "types": types,
+            "is_output": is_output,
+            "fanin_offsets": fanin_offsets,
+            "fanins": fanins,
+            "fanout_offsets": fanout_offsets,
+            "fanouts": fanouts,
+            "topological_order": np.array(order, dtype=np.int64),
+            "fanin_depths": np.array(fanin_depths, dtype=np.int64),
+            "fanout_depths": np.array(fanout_depths, dtype=np.int64),
+        }
+        for attribute, values in arrays.items():
+            values.flags.writeable = False
+            object.__setattr__(self, attribute, values)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "names", tuple(names))
+        object.__setattr__(
+            self, "_node_ids", {node: idx for idx, node in enumerate(self.names)}
+        )
+
+    def __setattr__(self, attribute, value):
+        raise AttributeError("ArrayCircuit is frozen")
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_circuit(cls, circuit):
+        """Build the array circuit of a circuit, an array circuit is returned as is."""
+        if isinstance(circuit, cls):
+            return circuit
+        nodes = circuit.graph.nodes
+        node_ids = {node: idx for idx, node in enumerate(nodes)}
+        predecessors = circuit.graph.pred
+        fanin_offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum([len(predecessors[node]) for node in nodes], out=fanin_offsets[1:])
+        return cls(
+            list(nodes),
+            [GATE_CODES[nodes[node]["type"]] for node in nodes],
+            [bool(nodes[node]["output"]) for node in nodes],
+            fanin_offsets,
+            [
+                fanin_id
+                for node in nodes
+                for fanin_id in sorted(node_ids[fanin] for fanin in predecessors[node])
+            ],
+            name=circuit.name,
+        )
+
+    def to_circuit(self):
+        """Convert the array circuit back into a CustomCircuit."""
+        circuit = CustomCircuit(name=self.name)
+        for node, code, output in zip(self.names, self.types, self.is_output):
+            circuit.graph.add_node(node, type=GATE_TYPES[code], output=bool(output))
+        fanins, starts = self.fanins.tolist(), self.fanin_offsets.tolist()
+        for idx, node in enumerate(self.names):
+            circuit.graph.add_edges_from(
+                (self.names[fanin], node)
+                for fanin in fanins[starts[idx] : starts[idx + 1]]
+            )
+        return circuit
+
+    def node_id(self, node):
+        """Return the id of the node with the given name."""
+        return self._node_ids[node]
+
+    def fanin(self, node_id):
+        """Return the fanin ids of the given node, in definition order."""
+        return self.fanins[
+            self.fanin_offsets[node_id] : self.fanin_offsets[node_id + 1]
+        ]
+
+    def fanout(self, node_id):
+        """Return the fanout ids of the given node."""
+        return self.fanouts[
+            self.fanout_offsets[node_id] : self.fanout_offsets[node_id + 1]
+        ]
+
+    @property
+    def input_ids(self):
+        """Return the ids of the inputs."""
+        return np.flatnonzero(self.types == GATE_CODES["input"])
+
+    @property
+    def output_ids(self):
+        """Return the ids of the outputs."""
+        return np.flatnonzero(self.is_output)
+
+    def fanout_cones(self, node_ids, outputs):
+        """Return the fanout cone size and the reached outputs of the nodes.
+
+        All cones are found in one reverse topological sweep, every node
+        OR-ing the integer bitsets of its fanouts. The reached outputs are a
+        bitset over the ids in ``outputs``, bit ``i`` for ``outputs[i]``.
+        """
+        fanouts, starts = self.fanouts.tolist(), self.fanout_offsets.tolist()
+        output_bit = {node: 1 << idx for idx, node in enumerate(outputs)}
+        kept = set(node_ids)
+        # The bitsets of a node are dropped once all its fanins read them
+        unread = np.diff(self.fanin_offsets).tolist()
+        cones, reached = {}, {}
+        for node in reversed(self.topological_order.tolist()):
+            cone = outputs_reached = 0
+            for fanout in fanouts[starts[node] : starts[node + 1]]:
+                cone |= 1 << fanout | cones[fanout]
+                outputs_reached |= output_bit.get(fanout, 0) | reached[fanout]
+                unread[fanout] -= 1
+                if not unread[fanout] and fanout not in kept:
+                    del cones[fanout], reached[fanout]
+            if unread[node] or node in kept:
+                cones[node], reached[node] = cone, outputs_reached
+        return (
+            [bin(cones[node]).count("1") for node in node_ids],
+            [reached[node] for node in node_ids],
+        )
@@ -0,0 +1,216 @@
+import gc
+
+import numpy as np
+
+from meta.formula import And, BinOp, Not, Or, Variable
+
+
+class ClauseStore:
+    """Compact DIMACS clause storage.
+
+    All literals are kept in one flat int32 array, clause ``i`` being
+    ``literals[offsets[i]:offsets[i + 1]]``. The variable and clause orders
+    embedded in the input file, if any, are kept alongside.
+    """
+
+    def __init__(
+        self,
+        literals,
+        offsets,
+        num_variables=0,
+        variable_order=None,
+        clause_order=None,
+    ):
+        self.literals = np.asarray(literals, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.num_variables = num_variables
+        self.variable_order = variable_order
+        self.clause_order = clause_order
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.clause(index)
+
+    def clause(self, index):
+        """Return the literals of the clause at the given index."""
+        return self.literals[self.offsets[index] : self.offsets[index + 1]]
+
+    def variables(self):
+        """Return the variables in order of their first occurrence."""
+        variables, first_index = np.unique(np.abs(self.literals), return_index=True)
+        return variables[np.argsort(first_index, kind="stable")].tolist()
+
+    def negated_variables(self):
+        """Return the set of variables occurring as a negative literal."""
+        return set(np.unique(-self.literals[self.literals < 0]).tolist())
+
+    def clause_formulas(self):
+        """Build the Or formulas of all clauses."""
+        literals = self.literals.tolist()
+        offsets = self.offsets.tolist()
+        # The clause nodes form no reference cycles, so the garbage collector
+        # is paused instead of repeatedly scanning the growing tree
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            nodes = {
+                literal: Not(Variable(-literal)) if literal < 0 else Variable(literal)
+                for literal in set(literals)
+            }
+            return tuple(
+                Or(*map(nodes.__getitem__, literals[start:end]))
+                for start, end in zip(offsets, offsets[1:])
+            )
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+
+class CNFFormula(And):
+    """A CNF sentence backed by a ClauseStore.
+
+    The clause formulas are only built once ``children`` is first accessed,
+    and the variables are read from the store directly. Assigning
+    ``children`` detaches the store, the formula is a plain And from then on.
+    """
+
+    __slots__ = ("store",)
+
+    def __init__(self, store):
+        self.store = store
+        self._children = None
+        self._clear_cache()
+
+    @property
+    def children(self):
+        if self._children is None:
+            self._children = self.store.clause_formulas()
+        return self._children
+
+    @children.setter
+    def children(self, children):
+        self.store = None
+        self._children = children
+        self._clear_cache()
+
+    def normal_form(self):
+        if self.store is None:
+            return super().normal_form()
+        return "cnf"
+
+    def variables(self):
+        if self.store is None:
+            return super().variables()
+        if self._variables is None:
+            self._variables = tuple(Variable(name) for name in self.store.variables())
+        return self._variables
+
+    def negated_variables(self):
+        if self.store is None:
+            return super().negated_variables()
+        if self._negated_variables is None:
+            self._negated_variables = frozenset(
+                Variable(name) for name in self.store.negated_variables()
+            )
+        return self._negated_variables
+
+    def __str__(self):
+        if self._children is not None:
+            return super().__str__()
+        return (
+            "("
+            + " {} ".format(self.operator).join(
+                "("
+                + " {} ".format(Or.operator).join(
+                    "¬" + str(-literal) if literal < 0 else str(literal)
+                    for literal in clause.tolist()
+                )
+                + ")"
+                for clause in self.store
+            )
+            + ")"
+        )
+
+    __repr__ = __str__
+
+
+def clause_literals(formula):
+    """Yield the variables, positive and negative variables of each clause.
+
+    Clause store backed formulas are read from the flat literal array, so the
+    clause formulas need not be built.
+    """
+    store = getattr(formula, "store", None)
+    if store is not None:
+        literals = store.literals.tolist()
+        offsets = store.offsets.tolist()
+        nodes = {abs(literal): Variable(abs(literal)) for literal in set(literals)}
+        for start, end in zip(offsets, offsets[1:]):
+            clause = literals[start:end]
+            yield (
+                tuple(dict.fromkeys(nodes[abs(literal)] for literal in clause)),
+                [nodes[literal] for literal in clause if literal > 0],
+                [nodes[-literal] for literal in clause if literal < 0],
+            )
+        return
+    for clause in formula.children:
+        terms = clause.children if isinstance(clause, BinOp) else (clause,)
+        yield (
+            clause.variables(),
+            [term for term in terms if isinstance(term, Variable)],
+            [
+                term.child
+                for term in terms
+                if isinstance(term, Not) and isinstance(term.child, Variable)
+            ],
+        )
+
+
+class OccurrenceIndex:
+    """Variable-to-clause occurrence index of a CNF formula.
+
+    Built in one pass over the clauses, it maps every variable to the indices
+    of the clauses it occurs in, and of the clauses that contain it as a
+    positive or negative literal.
+    """
+
+    def __init__(self, formula):
+        self.clause_variables = []
+        self.occurrences = {}
+        self.positive = {}
+        self.negative = {}
+        for index, (variables, positive, negative) in enumerate(
+            clause_literals(formula)
+        ):
+            self.clause_variables.append(variables)
+            for var in variables:
+                self.occurrences.setdefault(var, []).append(index)
+            for var in dict.fromkeys(positive):
+                self.positive.setdefault(var, []).append(index)
+            for var in dict.fromkeys(negative):
+                self.negative.setdefault(var, []).append(index)
+
+    def count(self, variable):
+        """Return the number of clauses the variable occurs in."""
+        return len(self.occurrences.get(variable, ()))
+
+    def neighbors(self, variable):
+        """Return the variables sharing a clause with the given variable."""
+        neighbors = set()
+        for index in self.occurrences.get(variable, ()):
+            neighbors.update(self.clause_variables[index])
+        neighbors.discard(variable)
+        return neighbors
+
+    def sort_by_dependencies(self, variables):
+        """Return the variables by descending number of dependencies.
+
+        The dependencies of a variable are the other variables it shares a
+        clause with. Variables with as many dependencies keep their order.
+        """
+        return sorted(
+            variables, key=lambda variable: len(self.neighbors(variable)), reverse=True
+        )
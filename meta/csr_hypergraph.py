@@ -0,0 +1,515 @@
+from array import array
+
+import numpy as np
+
+
+def gather_pins(pins, edge_offsets, edge_ids):
+    """Return the concatenated pins of the given hyperedges and their sizes."""
+    starts = edge_offsets[edge_ids]
+    sizes = edge_offsets[edge_ids + 1] - starts
+    pin_indices = np.repeat(starts - np.cumsum(sizes) + sizes, sizes)
+    pin_indices += np.arange(len(pin_indices))
+    return pins[pin_indices], sizes
+
+
+class CSRHypergraph:
+    """Hypergraph stored as compressed sparse row arrays.
+
+    Nodes and hyperedges are numbered in insertion order. The pins (node ids)
+    of hyperedge ``e`` are ``pins[edge_offsets[e]:edge_offsets[e + 1]]``, and
+    the incidence transpose lists the hyperedge ids of node ``n`` as
+    ``incident_edges[node_offsets[n]:node_offsets[n + 1]]``. Membership tests
+    go through dictionaries, so building a hypergraph is linear in its size.
+    Removing nodes, hyperedges or links rebuilds the arrays.
+    """
+
+    def __init__(self, nodes_mapping=None):
+        """
+        Initialize a hypergraph.
+        """
+        self._nodes = []  # Node id -> Node
+        self._node_ids = {}  # Node -> Node id
+        self._edges = []  # Hyperedge id -> Hyperedge
+        self._edge_ids = {}  # Hyperedge -> Hyperedge id
+        self._pins = array("q")
+        self._offsets = array("q", [0])
+        self._arrays = None
+        self._transpose = None
+        self.edge_labels = {}  # Pairing: Hyperedge -> Label
+        self.nodes_mapping = nodes_mapping  # Node mapping for KaHyPar graphs
+
+    def _changed(self):
+        self._arrays = None
+        self._transpose = None
+
+    @property
+    def pins(self):
+        """
+        Return the node ids of all hyperedges, hyperedge by hyperedge.
+        """
+        if self._arrays is None:
+            self._arrays = (
+                np.array(self._pins, dtype=np.int64),
+                np.array(self._offsets, dtype=np.int64),
+            )
+        return self._arrays[0]
+
+    @property
+    def edge_offsets(self):
+        """
+        Return the start of the pins of every hyperedge, plus the total.
+        """
+        self.pins
+        return self._arrays[1]
+
+    def _incidence(self):
+        if self._transpose is None:
+            degrees = np.bincount(self.pins, minlength=len(self._nodes))
+            node_offsets = np.zeros(len(self._nodes) + 1, dtype=np.int64)
+            np.cumsum(degrees, out=node_offsets[1:])
+            edge_of_pin = np.repeat(
+                np.arange(len(self._edges), dtype=np.int64),
+                np.diff(self.edge_offsets),
+            )
+            order = np.argsort(self.pins, kind="stable")
+            self._transpose = (node_offsets, edge_of_pin[order])
+        return self._transpose
+
+    @property
+    def node_offsets(self):
+        """
+        Return the start of the incident hyperedges of every node, plus the total.
+        """
+        return self._incidence()[0]
+
+    @property
+    def incident_edges(self):
+        """
+        Return the hyperedge ids incident to all nodes, node by node.
+        """
+        return self._incidence()[1]
+
+    def node_id(self, node):
+        """
+        Return the id of the given node.
+        """
+        return self._node_ids[node]
+
+    def edge_pins(self, edge_id):
+        """
+        Return the node ids of the hyperedge with the given id.
+        """
+        return self.pins[self.edge_offsets[edge_id] : self.edge_offsets[edge_id + 1]]
+
+    def nodes(self):
+        """
+        Return node list.
+        """
+        return list(self._nodes)
+
+    def hyperedges(self):
+        """
+        Return hyperedge list.
+        """
+        return list(self._edges)
+
+    def has_hyperedge(self, hyperedge):
+        """
+        Return whether the requested node exists.
+        """
+        return hyperedge in self._edge_ids
+
+    def links(self, obj):
+        """
+        Return all nodes connected by the given hyperedge or all hyperedges
+        connected to the given hypernode.
+        """
+        if obj in self._edge_ids:
+            return [self._nodes[pin] for pin in self.edge_pins(self._edge_ids[obj])]
+        node_id = self._node_ids[obj]
+        node_offsets, incident_edges = self._incidence()
+        return [
+            self._edges[edge]
+            for edge in incident_edges[
+                node_offsets[node_id] : node_offsets[node_id + 1]
+            ]
+        ]
+
+    def neighbors(self, node):
+        """
+        Return all neighbors adjacent to the given node.
+        """
+        node_id = self._node_ids[node]
+        node_offsets, incident_edges = self._incidence()
+        edges = incident_edges[node_offsets[node_id] : node_offsets[node_id + 1]]
+        neighbor_ids = np.unique(gather_pins(self.pins, self.edge_offsets, edges)[0])
+        return [self._nodes[pin] for pin in neighbor_ids if pin != node_id]
+
+    def has_node(self, node):
+        """
+        Return whether the requested node exists.
+        """
+        return node in self._node_ids
+
+    def add_node(self, node):
+        """
+        Add given node to the hypergraph.
+        """
+        if node not in self._node_ids:
+            self._node_ids[node] = len(self._nodes)
+            self._nodes.append(node)
+            self._changed()
+        else:
+            raise ValueError("Node %s already in graph" % node)
+
+    def add_nodes(self, nodelist):
+        """
+        Add given nodes to the hypergraph.
+        """
+        for each in nodelist:
+            self.add_node(each)
+
+    def del_node(self, node):
+        """
+        Delete a given node from the hypergraph.
+        """
+        if self.has_node(node):
+            node_id = self._node_ids.pop(node)
+            removed = self.pins == node_id
+            pins = self.pins[~removed]
+            pins[pins > node_id] -= 1
+            removed_before = np.concatenate(([0], np.cumsum(removed)))
+            offsets = self.edge_offsets - removed_before[self.edge_offsets]
+            self._set_pins(pins, offsets)
+            del self._nodes[node_id]
+            for moved_id in range(node_id, len(self._nodes)):
+                self._node_ids[self._nodes[moved_id]] = moved_id
+
+    def add_hyperedge(self, hyperedge, label=None):
+        """
+        Add given hyperedge to the hypergraph.
+        """
+        if hyperedge not in self._edge_ids:
+            pins = [
+                pin for pin in map(self._node_ids.get, hyperedge) if pin is not None
+            ]
+            if len(set(pins)) != len(pins):
+                node = next(self._nodes[pin] for pin in pins if pins.count(pin) > 1)
+                raise ValueError("Link (%s, %s) already in graph" % (node, hyperedge))
+            self._edge_ids[hyperedge] = len(self._edges)
+            self._edges.append(hyperedge)
+            if label is not None:
+                self.edge_labels[hyperedge] = label
+            self._pins.extend(pins)
+            self._offsets.append(len(self._pins))
+            self._changed()
+        else:
+            raise ValueError("Edge %s already in graph" % hyperedge)
+
+    def add_hyperedges(self, edgelist):
+        """
+        Add given hyperedges to the hypergraph, both with and without labels.
+        """
+        for item in edgelist:
+            if isinstance(item, tuple) and isinstance(item[0], tuple):
+                edge, label = item
+                self.add_hyperedge(edge, label=label)
+            else:
+                edge = item
+                self.add_hyperedge(edge)
+
+    def del_hyperedge(self, hyperedge):
+        """
+        Delete the given hyperedge.
+        """
+        # If a label is associated with the hyperedge, we select said hyperedge
+        hyperedge = next(
+            key for key, value in self.edge_labels.items() if value == hyperedge
+        )
+        if hyperedge in self._edge_ids:
+            edge_id = self._edge_ids.pop(hyperedge)
+            start, end = self.edge_offsets[edge_id], self.edge_offsets[edge_id + 1]
+            pins = np.concatenate((self.pins[:start], self.pins[end:]))
+            offsets = np.delete(self.edge_offsets, edge_id + 1)
+            offsets[edge_id + 1 :] -= end - start
+            self._set_pins(pins, offsets)
+            del self._edges[edge_id]
+            for moved_id in range(edge_id, len(self._edges)):
+                self._edge_ids[self._edges[moved_id]] = moved_id
+
+    def link(self, node, hyperedge):
+        """
+        Link given node and hyperedge.
+        """
+        if (
+            isinstance(hyperedge, tuple)
+            and len(hyperedge) == 1
+            and isinstance(hyperedge[0], tuple)
+        ):
+            hyperedge = hyperedge[0]
+
+        node_id = self._node_ids[node]
+        edge_id = self._edge_ids[hyperedge]
+        end = self._offsets[edge_id + 1]
+        if node_id not in self._pins[self._offsets[edge_id] : end]:
+            self._pins.insert(end, node_id)
+            for index in range(edge_id + 1, len(self._offsets)):
+                self._offsets[index] += 1
+            self._changed()
+        else:
+            raise ValueError("Link (%s, %s) already in graph" % (node, hyperedge))
+
+    def unlink(self, node, hyperedge):
+        """
+        Unlink given node and hyperedge.
+        """
+        node_id = self._node_ids[node]
+        edge_id = self._edge_ids.get(hyperedge)
+        if edge_id is not None:
+            start, end = self._offsets[edge_id], self._offsets[edge_id + 1]
+            if node_id in self._pins[start:end]:
+                del self._pins[self._pins.index(node_id, start, end)]
+                for index in range(edge_id + 1, len(self._offsets)):
+                    self._offsets[index] -= 1
+                self._changed()
+                return
+        raise ValueError("Link (%s, %s) is not in graph" % (node, hyperedge))
+
+    def _set_pins(self, pins, offsets):
+        self._pins = array("q", pins.astype(np.int64).tobytes())
+        self._offsets = array("q", offsets.astype(np.int64).tobytes())
+        self._changed()
+
+    def copy(self):
+        """
+        Create a copy of the hypergraph.
+        """
+        copied_hypergraph = CSRHypergraph()
+        copied_hypergraph._nodes = self._nodes[:]
+        copied_hypergraph._node_ids = self._node_ids.copy()
+        copied_hypergraph._edges = self._edges[:]
+        copied_hypergraph._edge_ids = self._edge_ids.copy()
+        copied_hypergraph._pins = array("q", self._pins)
+        copied_hypergraph._offsets = array("q", self._offsets)
+        copied_hypergraph.edge_labels = self.edge_labels.copy()
+
+        return copied_hypergraph
+
+    def convert_nodes_to_integers(self):
+        """
+        Convert node names to integers and replace them in the hyperedges.
+        Return the mapping.
+        """
+        if self.nodes_mapping is None:
+            nodes_mapping = {node: idx for idx, node in enumerate(self._nodes)}
+
+            # The pins already are node ids, only the names change
+            edges = [tuple(nodes_mapping[n] for n in edge) for edge in self._edges]
+            self.edge_labels = {
+                edges[self._edge_ids[edge]]: label
+                for edge, label in self.edge_labels.items()
+                if edge in self._edge_ids
+            }
+            self._nodes = list(range(len(self._nodes)))
+            self._node_ids = {node: node for node in self._nodes}
+            self._edges = edges
+            self._edge_ids = {edge: idx for idx, edge in enumerate(edges)}
+            self.nodes_mapping = nodes_mapping
+
+        return self.nodes_mapping
+
+    @classmethod
+    def from_arrays(cls, pins, edge_offsets, num_nodes):
+        """
+        Build a hypergraph from its CSR arrays. Nodes and hyperedges are
+        named by their ids.
+        """
+        hypergraph = cls()
+        hypergraph._nodes = list(range(num_nodes))
+        hypergraph._node_ids = {node: node for node in hypergraph._nodes}
+        hypergraph._edges = list(range(len(edge_offsets) - 1))
+        hypergraph._edge_ids = {edge: edge for edge in hypergraph._edges}
+        hypergraph._pins = array("q", np.asarray(pins, dtype=np.int64).tobytes())
+        hypergraph._offsets = array(
+            "q", np.asarray(edge_offsets, dtype=np.int64).tobytes()
+        )
+        return hypergraph
+
+    def view(self):
+        """
+        Return a view of the whole hypergraph to partition recursively.
+        """
+        return HypergraphView(self)
+
+    def to_kahypar(self):
+        """
+        Convert the hypergraph into a format compatible with mtkahypar.
+
+        Returns:
+            MTKahyparHypergraph: A Hypergraph instance compatible with mtkahypar.
+        """
+        import mtkahypar
+
+        pins = self.pins.tolist()
+        offsets = self.edge_offsets.tolist()
+        mtkahypar_hypergraph = mtkahypar.Hypergraph(
+            num_hypernodes=len(self._nodes),
+            num_hyperedges=len(self._edges),
+            hyperedges=[pins[start:end] for start, end in zip(offsets, offsets[1:])],
+        )
+
+        return mtkahypar_hypergraph, self.hyperedges()
+
+
+class HypergraphView:
+    """Induced sub-hypergraph of a CSRHypergraph.
+
+    A view is a range of a node permutation and a range of a hyperedge
+    permutation, both shared with the root view of the parent hypergraph.
+    Splitting a view into blocks reorders its ranges in place, so recursive
+    partitioning never copies hyperedges or relabels nodes, and all views of
+    a hypergraph together take memory linear in its size. The nodes of the
+    leaves, read in permutation order, are the order found by the recursion.
+    """
+
+    def __init__(self, hypergraph, shared=None, bounds=None):
+        self.hypergraph = hypergraph
+        if shared is None:
+            num_nodes = len(hypergraph.nodes())
+            num_edges = len(hypergraph.hyperedges())
+            shared = (
+                np.arange(num_nodes, dtype=np.int64),  # Node permutation
+                np.arange(num_edges, dtype=np.int64),  # Hyperedge permutation
+                np.empty(num_nodes, dtype=np.int64),  # Per node scratch space
+            )
+            bounds = (0, num_nodes, 0, num_edges)
+        self._shared = shared
+        self._bounds = bounds
+
+    @property
+    def node_ids(self):
+        """
+        Return the parent ids of the nodes of the view.
+        """
+        return self._shared[0][self._bounds[0] : self._bounds[1]]
+
+    @property
+    def edge_ids(self):
+        """
+        Return the parent ids of the hyperedges of the view.
+        """
+        return self._shared[1][self._bounds[2] : self._bounds[3]]
+
+    @property
+    def num_nodes(self):
+        return self._bounds[1] - self._bounds[0]
+
+    @property
+    def num_hyperedges(self):
+        return self._bounds[3] - self._bounds[2]
+
+    def nodes(self):
+        """
+        Return node list.
+        """
+        nodes = self.hypergraph._nodes
+        return [nodes[node_id] for node_id in self.node_ids.tolist()]
+
+    def hyperedges(self):
+        """
+        Return hyperedge list.
+        """
+        edges = self.hypergraph._edges
+        return [edges[edge_id] for edge_id in self.edge_ids.tolist()]
+
+    def local_arrays(self):
+        """
+        Return the pins and edge offsets of the view, with the nodes numbered
+        by their position within the view.
+        """
+        local_ids = self._shared[2]
+        local_ids[self.node_ids] = np.arange(self.num_nodes)
+        pins, sizes = gather_pins(
+            self.hypergraph.pins, self.hypergraph.edge_offsets, self.edge_ids
+        )
+        edge_offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=edge_offsets[1:])
+        return local_ids[pins], edge_offsets
+
+    def local_hyperedges(self):
+        """
+        Return the hyperedges as lists of node positions within the view.
+        """
+        pins, edge_offsets = self.local_arrays()
+        pins = pins.tolist()
+        edge_offsets = edge_offsets.tolist()
+        return [pins[start:end] for start, end in zip(edge_offsets, edge_offsets[1:])]
+
+    def split(self, blocks, num_blocks=2):
+        """
+        Split the view by the block of every node, given in view order.
+
+        Nodes keep their relative order within a block, and only hyperedges
+        with all pins in one block are kept. Return one view per block.
+        """
+        blocks = np.asarray(blocks, dtype=np.int64)
+        node_start, node_end, edge_start, edge_end = self._bounds
+
+        node_ids = self.node_ids
+        node_order = np.argsort(blocks, kind="stable")
+        node_ids[:] = node_ids[node_order]
+        node_bounds = node_start + np.concatenate(
+            ([0], np.cumsum(np.bincount(blocks, minlength=num_blocks)))
+        )
+
+        block_of = self._shared[2]
+        block_of[node_ids] = blocks[node_order]
+        edge_ids = self.edge_ids
+        pins, sizes = gather_pins(
+            self.hypergraph.pins, self.hypergraph.edge_offsets, edge_ids
+        )
+        # Cut and empty hyperedges are moved behind all blocks
+        edge_blocks = np.full(len(edge_ids), num_blocks, dtype=np.int64)
+        non_empty = sizes > 0
+        if len(pins):
+            starts = (np.cumsum(sizes) - sizes)[non_empty]
+            pin_blocks = block_of[pins]
+            lowest = np.minimum.reduceat(pin_blocks, starts)
+            highest = np.maximum.reduceat(pin_blocks, starts)
+            edge_blocks[non_empty] = np.where(lowest == highest, lowest, num_blocks)
+        edge_order = np.argsort(edge_blocks, kind="stable")
+        edge_ids[:] = edge_ids[edge_order]
+        edge_bounds = edge_start + np.concatenate(
+            ([0], np.cumsum(np.bincount(edge_blocks, minlength=num_blocks + 1)))
+        )
+
+        return [
+            HypergraphView(
+                self.hypergraph,
+                self._shared,
+                (
+                    int(node_bounds[block]),
+                    int(node_bounds[block + 1]),
+                    int(edge_bounds[block]),
+                    int(edge_bounds[block + 1]),
+                ),
+            )
+            for block in range(num_blocks)
+        ]
+
+    def to_kahypar(self):
+        """
+        Convert the view into a format compatible with mtkahypar.
+
+        Returns:
+            MTKahyparHypergraph: A Hypergraph instance compatible with mtkahypar.
+        """
+        import mtkahypar
+
+        mtkahypar_hypergraph = mtkahypar.Hypergraph(
+            num_hypernodes=self.num_nodes,
+            num_hyperedges=self.num_hyperedges,
+            hyperedges=self.local_hyperedges(),
+        )
+
+        return mtkahypar_hypergraph, self.hyperedges()
@@ -1,4 +1,9 @@
+import weakref
+
+
 class Formula:
+    __slots__ = ()
+
     def __invert__(self):
         return Not(self)
 
@@ -14,65 +19,137 @@ class Formula:
     def eval(self, v):
         raise NotImplementedError("Plain formula can not be evaluated")
 
+    def normal_form(self):
+        """Return "cnf" for a conjunction of disjunctions, "dnf" for a
+        disjunction of conjunctions and None otherwise."""
+        return None
+
     def is_cnf(self):
-        return (
-            isinstance(self, And)
-            and all(isinstance(child, Or) for child in self.children)
-            and all(
-                (isinstance(var, Variable) for var in child.children)
-                for child in self.children
-            )
-        )
+        return self.normal_form() == "cnf"
 
     def is_dnf(self):
-        return (
-            isinstance(self, Or)
-            and all(isinstance(child, And) for child in self.children)
-            and all(
-                (isinstance(var, Variable) for var in child.children)
-                for child in self.children
+        return self.normal_form() == "dnf"
+
+    def iter_nodes(self):
+        """Yield all nodes in depth-first pre-order, using an explicit stack."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            if isinstance(node, BinOp):
+                stack.extend(reversed(node.children))
+            elif isinstance(node, Not):
+                stack.append(node.child)
+
+    def variables(self):
+        """Return the variables in order of their first occurrence."""
+        return tuple(
+            dict.fromkeys(
+                node for node in self.iter_nodes() if isinstance(node, Variable)
             )
         )
 
+    def negated_variables(self):
+        """Return the variables that occur negated."""
+        return frozenset(
+            node.child
+            for node in self.iter_nodes()
+            if isinstance(node, Not) and isinstance(node.child, Variable)
+        )
+
     def extract_variables(self):
-        variables = []
-        seen_variables = set()  # To track variables that have been added already
-
-        def add_variable(var):
-            if var not in seen_variables:
-                variables.append(var)
-                seen_variables.add(var)
-
-        if isinstance(self, Variable):
-            add_variable(self)
-        elif isinstance(self, BinOp):
-            for child in self.children:
-                for var in child.extract_variables():
-                    add_variable(var)
-        elif isinstance(self, Not):
-            for var in self.child.extract_variables():
-                add_variable(var)
-
-        return variables
+        return list(self.variables())
 
     def extract_negated_variables(self):
-        negated_variables = set()
-        if isinstance(self, Not) and isinstance(self.child, Variable):
-            negated_variables.add(self.child)
-        elif isinstance(self, BinOp):
-            for child in self.children:
-                negated_variables.update(child.extract_negated_variables())
-        elif isinstance(self, Not):
-            negated_variables.update(self.child.extract_negated_variables())
-        return negated_variables
+        return set(self.negated_variables())
+
+
+def _evaluate(formula, v):
+    """Evaluate a formula bottom-up with an explicit stack.
+
+    Each stack frame holds a node and the index of its next child; like
+    all() and any(), And and Or stop at the first deciding child.
+    """
+    stack = [[formula, 0]]
+    value = None
+    while stack:
+        frame = stack[-1]
+        node, index = frame
+        if isinstance(node, Not):
+            if index == 0:
+                frame[1] = 1
+                stack.append([node.child, 0])
+                continue
+            value = not value
+        elif isinstance(node, (And, Or)):
+            if index > 0 and value == isinstance(node, Or):
+                stack.pop()  # Short-circuit with the value of the last child
+                continue
+            if index < len(node.children):
+                frame[1] = index + 1
+                stack.append([node.children[index], 0])
+                continue
+            value = isinstance(node, And)
+        elif isinstance(node, bool):
+            value = node  # Empty conjunctions and disjunctions in SAT input
+        else:
+            value = node.eval(v)
+        stack.pop()
+    return value
+
+
+def _render(formula):
+    """Render a formula as a string with an explicit stack."""
+    parts = []
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            parts.append(node)
+        elif isinstance(node, BinOp):
+            stack.append(")")
+            separator = " {} ".format(node.operator)
+            for index, child in enumerate(reversed(node.children)):
+                if index:
+                    stack.append(separator)
+                stack.append(child)
+            stack.append("(")
+        elif isinstance(node, Not):
+            stack.append(node.child)
+            stack.append("¬")
+        else:
+            parts.append(str(node))
+    return "".join(parts)
 
 
 class BinOp(Formula):
+    """An n-ary operator node.
+
+    The variables, negated variables and normal form are computed once and
+    cached on the node; assigning ``children`` clears the cache.
+    """
+
+    __slots__ = ("_children", "_variables", "_negated_variables", "_normal_form")
+
     def __init__(self, *children):
         self.children = children
 
+    @property
+    def children(self):
+        return self._children
+
+    @children.setter
+    def children(self, children):
+        self._children = children
+        self._clear_cache()
+
+    def _clear_cache(self):
+        self._variables = None
+        self._negated_variables = None
+        self._normal_form = None
+
     def __str__(self):
-        return "(" + " {} ".format(self.operator).join(map(str, self.children)) + ")"
+        return _render(self)
 
     __repr__ = __str__
 
@@ -83,33 +160,95 @@ class BinOp(Formula):
     def eq(self, other):
         return self.children == other.children
 
+    def normal_form(self):
+        if self._normal_form is None:
+            self._normal_form = ""
+            if isinstance(self, And):
+                if all(isinstance(child, Or) for child in self.children):
+                    self._normal_form = "cnf"
+            elif isinstance(self, Or):
+                if all(isinstance(child, And) for child in self.children):
+                    self._normal_form = "dnf"
+        return self._normal_form or None
+
+    def variables(self):
+        if self._variables is None:
+            self._variables = super().variables()
+        return self._variables
+
+    def negated_variables(self):
+        if self._negated_variables is None:
+            self._negated_variables = super().negated_variables()
+        return self._negated_variables
+
 
 class And(BinOp):
+    __slots__ = ()
     operator = "∧"
 
     def eval(self, v):
-        return all(child.eval(v) for child in self.children)
+        return _evaluate(self, v)
 
 
 class Or(BinOp):
+    __slots__ = ()
     operator = "∨"
 
     def eval(self, v):
-        return any(child.eval(v) for child in self.children)
+        return _evaluate(self, v)
 
 
 class Not(Formula):
-    def __init__(self, child):
-        self.child = child
+    """Negation of a formula.
+
+    Negated variables (literals) are interned: ``Not(x)`` always returns the
+    same node, so literals compare by identity. The intern table only holds
+    the literals that are still referenced elsewhere.
+    """
+
+    __slots__ = ("child", "_hash", "__weakref__")
+    _literals = weakref.WeakValueDictionary()
+
+    def __new__(cls, child):
+        if isinstance(child, Variable):
+            node = cls._literals.get(child)
+            if node is None:
+                node = super().__new__(cls)
+                node.child = child
+                node._hash = hash(("Not", child))
+                cls._literals[child] = node
+            return node
+        node = super().__new__(cls)
+        node.child = child
+        node._hash = None
+        return node
+
+    def __reduce__(self):
+        return Not, (self.child,)
+
+    def variables(self):
+        if self._hash is not None:  # A literal
+            return (self.child,)
+        return super().variables()
+
+    def negated_variables(self):
+        if self._hash is not None:  # A literal
+            return frozenset((self.child,))
+        return super().negated_variables()
+
+    def __eq__(self, other):
+        return self is other or (other.__class__ is Not and self.child == other.child)
 
     def __hash__(self):
-        return hash(("Not", self.child))
+        if self._hash is None:
+            return hash(("Not", self.child))
+        return self._hash
 
     def eval(self, v):
-        return not self.child.eval(v)
+        return _evaluate(self, v)
 
     def __str__(self):
-        return "¬" + str(self.child)
+        return _render(self)
 
     __repr__ = __str__
 
@@ -118,11 +257,39 @@ class Not(Formula):
 
 
 class Variable(Formula):
-    def __init__(self, name):
-        self.name = name
+    """A propositional variable.
+
+    Variables are interned by name: ``Variable(name)`` always returns the
+    same node, so variables compare by identity. The intern table only holds
+    the variables that are still referenced elsewhere.
+    """
+
+    __slots__ = ("name", "_hash", "__weakref__")
+    _variables = weakref.WeakValueDictionary()
+
+    def __new__(cls, name):
+        node = cls._variables.get(name)
+        if node is None:
+            node = super().__new__(cls)
+            node.name = name
+            node._hash = hash(name)
+            cls._variables[name] = node
+        return node
+
+    def __reduce__(self):
+        return Variable, (self.name,)
+
+    def variables(self):
+        return (self,)
+
+    def negated_variables(self):
+        return frozenset()
+
+    def __eq__(self, other):
+        return self is other
 
     def __hash__(self):
-        return hash(self.name)
+        return self._hash
 
     def eval(self, v):
         return self in v
@@ -105,7 +105,7 @@ class Hypergraph:
             if label is not None:
                 self.edge_labels[hyperedge] = label
             for node in hyperedge:
-                if node in self.nodes():
+                if node in self.node_links:
                     self.link(node, hyperedge)
         else:
             raise ValueError("Edge %s already in graph" % hyperedge)
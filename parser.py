@@ -1,26 +1,78 @@
-import collections
+import array
+import bz2
+import gzip
+import lzma
+import os
+import re
 import typing
 
-import circuitgraph as cg
+import numpy as np
+from circuitgraph.io import verilog_to_circuit
 
 from meta.circuit import CustomCircuit
+from meta.cnf import ClauseStore, CNFFormula
 from meta.formula import And, Not, Or, Variable
 
+# Bump whenever the parsed representation changes, invalidating cached parses
+PARSER_VERSION = 2
+
+# Comment prefixes of the embedded FMINCE orders, see _parse_order_hint
+ORDER_HINTS = {"c vo": "variable_order", "c co": "clause_order"}
+
+# Compressed inputs are recognized by their magic bytes and decoded as a stream
+COMPRESSION_MAGIC = {
+    b"\x1f\x8b": gzip.open,
+    b"\xfd7zXZ\x00": lzma.open,
+    b"BZh": bz2.open,
+}
+COMPRESSION_SUFFIXES = (".gz", ".xz", ".bz2")
+
 
 class ParserWarning(Exception):
     pass
 
 
+def strip_compression_suffix(path: str) -> str:
+    """Return the path without a trailing compression suffix."""
+    for suffix in COMPRESSION_SUFFIXES:
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def open_input(path: str) -> typing.TextIO:
+    """Open an input file as text, decompressing it on the fly if needed.
+
+    The compression is detected from the magic bytes, so a compressed file
+    is never decompressed to disk.
+    """
+    with open(path, "rb") as fp:
+        magic = fp.read(6)
+    for prefix, opener in COMPRESSION_MAGIC.items():
+        if magic.startswith(prefix):
+            return opener(path, "rt")
+    return open(path, "r")
+
+
 def load(path: str):
     """Load a sentence from an open file.
 
-    The format is automatically detected.
+    The format is automatically detected, also inside gzip, xz or bzip2
+    compressed files.
     """
-    if path.endswith(".v"):
-        return "v", cg.from_file(path)
-    with open(path, "r") as fp:
+    base_path = strip_compression_suffix(path)
+    if base_path.endswith(".v"):
+        name = os.path.splitext(os.path.basename(base_path))[0]
+        with open_input(path) as fp:
+            circuit = verilog_to_circuit(fp.read(), name, infer_module_name=True)
+        return "v", CustomCircuit(
+            name=circuit.name, graph=circuit.graph, blackboxes=circuit.blackboxes
+        )
+    hints = {}  # type: typing.Dict[str, np.ndarray]
+    with open_input(path) as fp:
         for line in fp:
             if line.startswith("c") or line.startswith("//"):
+                _parse_order_hint(line, hints)
                 continue
             if line.startswith("p "):
                 problem = line.split()
@@ -34,7 +86,9 @@ def load(path: str):
                 elif "cnf" in fmt or "CNF" in fmt:
                     # problem[2] has the number of variables
                     # problem[3] has the number of clauses
-                    return "cnf", _load_cnf(fp)
+                    return "cnf", _load_cnf(
+                        fp, *_parse_header_counts(problem[2:4]), hints=hints
+                    )
                 else:
                     raise ParserWarning("Unknown format '{}'".format(fmt))
             elif line.strip() == "BC1.1":
@@ -50,7 +104,7 @@ def load(path: str):
 
 
 def _load_sat(fp: typing.TextIO):
-    tokens = collections.deque()  # type: typing.Deque[str]
+    tokens = []  # type: typing.List[str]
     for line in fp:
         if line.startswith("c"):
             continue
@@ -62,82 +116,150 @@ def _load_sat(fp: typing.TextIO):
             .replace("-", " - ")
             .split()
         )
-    result = _parse_sat(tokens)
-    if tokens:
+    result, position = _parse_sat(tokens)
+    if position < len(tokens):
         raise ParserWarning("Found extra tokens past the end of the sentence")
     return result
 
 
-def _parse_sat(tokens: "typing.Deque[str]"):
-    cur = tokens.popleft()
-    if cur == "(":
-        content = _parse_sat(tokens)
-        if not tokens:
-            raise ParserWarning("Unexpected end of tokens after opening parenthesis")
-        close = tokens.popleft()
-        if close != ")":
-            raise ParserWarning("Expected closing paren, found {!r}".format(close))
-        return content
-    elif cur == "-":
-        content = _parse_sat(tokens)
-        if not isinstance(content, Variable):
-            raise ParserWarning(
-                "Only variables can be negated, not {!r}".format(content)
-            )
-        return Not(content)
-    elif cur == "*(":
-        children = []
-        while tokens[0] != ")":
-            children.append(_parse_sat(tokens))
-        tokens.popleft()
-        if children:
-            return And(*children)
-        else:
-            return True
-    elif cur == "+(":
-        children = []
-        while tokens[0] != ")":
-            children.append(_parse_sat(tokens))
-        tokens.popleft()
-        if children:
-            return Or(*children)
+def _parse_sat(tokens: typing.List[str]):
+    """Parse a SAT sentence in one pass with an explicit stack.
+
+    Each stack frame is an open parenthesis, a negation, or a conjunction or
+    disjunction collecting its children. Returns the sentence and the
+    position of the first unused token.
+    """
+    stack = []  # type: typing.List[typing.Tuple[str, list]]
+    position = 0
+    while True:
+        if stack and stack[-1][0] in ("*(", "+("):
+            if position >= len(tokens):
+                raise ParserWarning("Unexpected end of tokens before closing paren")
+            if tokens[position] == ")":
+                position += 1
+                operator, children = stack.pop()
+                if operator == "*(":
+                    result = And(*children) if children else True
+                else:
+                    result = Or(*children) if children else False
+            else:
+                result = None
         else:
-            return False
-    else:
-        return Variable(_parse_int(cur))
+            result = None
 
+        if result is None:
+            if position >= len(tokens):
+                raise ParserWarning("Unexpected end of tokens")
+            cur = tokens[position]
+            position += 1
+            if cur in ("(", "-", "*(", "+("):
+                stack.append((cur, []))
+                continue
+            result = Variable(_parse_int(cur))
+
+        # Hand the parsed sentence to the enclosing frames
+        while stack and stack[-1][0] in ("(", "-"):
+            operator, _ = stack.pop()
+            if operator == "(":
+                if position >= len(tokens):
+                    raise ParserWarning(
+                        "Unexpected end of tokens after opening parenthesis"
+                    )
+                close = tokens[position]
+                position += 1
+                if close != ")":
+                    raise ParserWarning(
+                        "Expected closing paren, found {!r}".format(close)
+                    )
+            else:
+                if not isinstance(result, Variable):
+                    raise ParserWarning(
+                        "Only variables can be negated, not {!r}".format(result)
+                    )
+                result = Not(result)
+        if not stack:
+            return result, position
+        stack[-1][1].append(result)
+
+
+def _parse_header_counts(counts: typing.List[str]) -> typing.List[int]:
+    """Parse the optional counts of a problem line, defaulting to zero."""
+    try:
+        return [max(int(count), 0) for count in counts]
+    except ValueError:
+        return []
+
+
+def _parse_order_hint(line: str, hints: typing.Dict[str, np.ndarray]):
+    """Decode a nested-bracket ``c vo``/``c co`` comment into a flat order.
+
+    The variable order lists 1-based variables, the clause order lists
+    0-based clause indices.
+    """
+    hint = ORDER_HINTS.get(line[:4])
+    if hint is not None and line[4:].lstrip().startswith("["):
+        hints[hint] = np.array(
+            [int(number) for number in re.findall(r"\d+", line[4:])], dtype=np.int32
+        )
+
+
+def _load_cnf(
+    fp: typing.TextIO,
+    num_variables: int = 0,
+    num_clauses: int = 0,
+    hints: typing.Optional[typing.Dict[str, np.ndarray]] = None,
+):
+    """Stream the clauses of a DIMACS CNF file into a ClauseStore.
+
+    The clause offsets are preallocated from the problem line; the formula
+    objects are only built once the clauses are accessed. Embedded order
+    hints are kept next to the clauses.
+    """
+    if hints is None:
+        hints = {}
+    literals = array.array("i")
+    offsets = np.zeros(num_clauses + 1, dtype=np.int64)
+    count = 0
+
+    def close_clause():
+        nonlocal offsets, count
+        count += 1
+        if count == len(offsets):
+            # The problem line announced too few clauses
+            offsets = np.resize(offsets, 2 * len(offsets))
+        offsets[count] = len(literals)
 
-def _load_cnf(fp: typing.TextIO):
-    tokens = []  # type: typing.List[str]
     for line in fp:
         if line.startswith("c"):
+            _parse_order_hint(line, hints)
             continue
-        tokens.extend(line.replace("-", " -").split())
-    return _parse_cnf(tokens)
-
-
-def _parse_cnf(tokens: typing.Iterable[str]):
-    clauses = (
-        collections.OrderedDict()
-    )  # type: typing.OrderedDict[int, typing.Tuple[Formula, ...]]
-    clause = []  # type: typing.List[Formula]
-
-    for token in tokens:
-        if token == "0":
-            clauses[len(clauses)] = tuple(clause)
-            clause = []
-        elif token.startswith("-"):
-            clause.append(Not(Variable(_parse_int(token[1:]))))
-        else:
-            clause.append(Variable(_parse_int(token)))
-    if clause:
+        tokens = line.replace("-", " -").split()
+        try:
+            values = [int(token) for token in tokens]
+        except ValueError:
+            values = [_parse_int(token) for token in tokens]
+        if values and values[-1] == 0 and 0 not in values[:-1]:
+            # Common case: exactly one terminated clause per line
+            literals.extend(values[:-1])
+            close_clause()
+            continue
+        for value in values:
+            if value == 0:
+                close_clause()
+            else:
+                literals.append(value)
+    if len(literals) > offsets[count]:
         # A file may or may not end with a 0
         # Adding an empty clause is not desirable
-        clauses[len(clauses)] = clause
+        close_clause()
 
-    ordered_clauses = [tuple(clause) for clause in clauses.values()]
-    sentence = And(*[Or(*clause_tuple) for clause_tuple in ordered_clauses])
-    return sentence
+    store = ClauseStore(
+        np.frombuffer(literals, dtype=np.int32),
+        offsets[: count + 1],
+        num_variables,
+        **hints,
+    )
+    return CNFFormula(store)
 
 
 def _parse_int(token: str) -> int:
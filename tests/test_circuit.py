@@ -0,0 +1,91 @@
+import os
+import parser
+
+import pytest
+
+from heuristics import bc_fanin
+from meta.circuit import GATE_TYPES, ArrayCircuit, CustomCircuit
+
+
+def load_circuit(filename):
+    path_name = os.path.join(os.path.dirname(__file__), filename)
+    _, circuit = parser.load(path_name)
+    return circuit
+
+
+@pytest.mark.parametrize(
+    "testfile",
+    ["testfiles/c88.v", "testfiles/5xor.v", "testfiles/bc-example3.txt"],
+)
+def test_array_circuit__fanout_cones(testfile):
+    circuit = load_circuit(testfile)
+    inputs = CustomCircuit.get_ordered_inputs(circuit)
+    outputs = CustomCircuit.get_ordered_outputs(circuit)
+    array_circuit = ArrayCircuit.from_circuit(circuit)
+
+    cone_sizes, reached_outputs = array_circuit.fanout_cones(
+        [array_circuit.node_id(node) for node in inputs],
+        [array_circuit.node_id(node) for node in outputs],
+    )
+
+    for node, cone_size, reached in zip(inputs, cone_sizes, reached_outputs):
+        fanout = circuit.transitive_fanout(node)
+        assert cone_size == len(fanout)
+        assert [output in fanout for output in outputs] == [
+            bool(reached >> idx & 1) for idx in range(len(outputs))
+        ]
+
+
+def test_bc_fanin__does_not_modify_circuit():
+    circuit = load_circuit("testfiles/c88.v")
+    nodes = dict(circuit.graph.nodes(data=True))
+    edges = list(circuit.graph.edges)
+
+    _, order = bc_fanin.calculate(circuit)
+
+    assert sorted(order) == sorted(CustomCircuit.get_ordered_inputs(circuit))
+    assert dict(circuit.graph.nodes(data=True)) == nodes
+    assert list(circuit.graph.edges) == edges
+
+
+@pytest.mark.parametrize("testfile", ["testfiles/c88.v", "testfiles/bc-example3.txt"])
+def test_array_circuit__from_circuit(testfile):
+    circuit = load_circuit(testfile)
+
+    array_circuit = ArrayCircuit.from_circuit(circuit)
+
+    nodes = circuit.graph.nodes
+    assert array_circuit.names == tuple(nodes)
+    assert [GATE_TYPES[code] for code in array_circuit.types] == [
+        nodes[node]["type"] for node in nodes
+    ]
+    for idx, node in enumerate(array_circuit.names):
+        fanins = [array_circuit.names[fanin] for fanin in array_circuit.fanin(idx)]
+        fanouts = {array_circuit.names[fanout] for fanout in array_circuit.fanout(idx)}
+        assert fanins == CustomCircuit.get_ordered_fanin(circuit, node)
+        assert fanouts == circuit.fanout(node)
+        assert array_circuit.fanin_depths[idx] == circuit.fanin_depth(node)
+        assert array_circuit.fanout_depths[idx] == circuit.fanout_depth(node)
+    position = {node: idx for idx, node in enumerate(array_circuit.topological_order)}
+    for node in range(len(array_circuit)):
+        assert all(
+            position[fanin] < position[node] for fanin in array_circuit.fanin(node)
+        )
+    assert ArrayCircuit.from_circuit(array_circuit) is array_circuit
+
+
+def test_array_circuit__round_trip_and_frozen():
+    circuit = load_circuit("testfiles/bc-example3.txt")
+    array_circuit = ArrayCircuit.from_circuit(circuit)
+
+    restored = array_circuit.to_circuit()
+
+    assert isinstance(restored, CustomCircuit)
+    assert list(restored.graph.nodes(data=True)) == list(circuit.graph.nodes(data=True))
+    assert [list(restored.graph.pred[node]) for node in restored.graph] == [
+        list(circuit.graph.pred[node]) for node in circuit.graph
+    ]
+    with pytest.raises(AttributeError):
+        array_circuit.names = ()
+    with pytest.raises(ValueError):
+        array_circuit.fanins[0] = 0
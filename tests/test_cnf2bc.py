@@ -1,4 +1,7 @@
+import pytest
+
 from helpers import cnf2bc
+from meta.cnf import OccurrenceIndex
 from meta.formula import And, Or, Variable
 
 
@@ -44,3 +47,35 @@ def test_extract_literals_and_dependencies():
     assert set(dependencies[:2]) == {a, b}  # 4 dependencies
     assert set(dependencies[2:4]) == {d, e}  # 3 dependencies
     assert dependencies[4] == c  # 2 dependencies
+
+
+def test_occurrence_index():
+    a, b, c, d, e = create_variables("a", "b", "c", "d", "e")
+    clauses = [(a, c), (~a, e), (~a, ~b, c), (~a, b, ~d), (b, ~d, e)]
+    index = OccurrenceIndex(create_cnf_formula(clauses))
+
+    assert index.occurrences[a] == [0, 1, 2, 3]
+    assert index.positive[a] == [0]
+    assert index.negative[a] == [1, 2, 3]
+    assert index.count(b) == 3
+    assert index.neighbors(a) == {b, c, d, e}
+    assert index.neighbors(c) == {a, b}
+
+
+@pytest.mark.parametrize("method", ["occurrences", "dependencies"])
+def test_cnf2bc__indexes_each_subproblem_once(monkeypatch, method):
+    indexed = []
+
+    class RecordingIndex(OccurrenceIndex):
+        def __init__(self, formula):
+            indexed.append(formula)
+            super().__init__(formula)
+
+    monkeypatch.setattr(cnf2bc, "OccurrenceIndex", RecordingIndex)
+    a, b, c, d, e = create_variables("a", "b", "c", "d", "e")
+    clauses = [(a, c), (~a, e), (~a, ~b, c), (~a, b, ~d), (b, ~d, e), (a, d, e)]
+
+    cnf2bc.cnf2bc(create_cnf_formula(clauses), method)
+
+    assert len(indexed) > 1
+    assert len({id(formula) for formula in indexed}) == len(indexed)
@@ -0,0 +1,193 @@
+import math
+import os
+import parser
+import random
+from collections import namedtuple
+
+from helpers.cnf2hypergraph import cnf2hypergraph
+from heuristics import force
+from meta.csr_hypergraph import CSRHypergraph
+from meta.hypergraph import Hypergraph
+
+TEST_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "input_files", "iscas-new", "b01.bench.dimacs"
+)
+
+
+def new_hypergraph():
+    hypergraph = Hypergraph()
+    hypergraph.add_nodes(["x0", "x1", "x2", "x3", "x4", "x5", "x6"])
+    hypergraph.add_hyperedges(
+        [
+            (("x0", "x4"), "e1"),
+            (("x0", "x2", "x4", "x6"), "e2"),
+            (("x1", "x6"), "e3"),
+            (("x2", "x3", "x6"), "e4"),
+            (("x4", "x5"), "e5"),
+        ]
+    )
+    return hypergraph
+
+
+VarInfo = namedtuple("VarInfo", ["sum_cog", "num_occurs"])
+
+
+def compute_sum_of_spans(graph, idx_of_var):
+    sum_spans = 0
+    for edge in graph.hyperedges():
+        if not edge:
+            continue
+        indices = [idx_of_var[var] for var in edge]
+        sum_spans += max(indices) - min(indices)
+    return sum_spans
+
+
+def execute_with_order(graph, var_of_idx):
+    # The original scalar FORCE, the reference of the array implementation
+    num_vars = len(var_of_idx)
+    idx_of_var = {var: idx for idx, var in enumerate(var_of_idx)}
+
+    best_sum_spans = compute_sum_of_spans(graph, idx_of_var)
+    best_order = list(var_of_idx)
+
+    num_iterations = int(5 * math.log(num_vars))
+
+    for _ in range(num_iterations):
+        infos = [VarInfo(0.0, 0) for _ in range(num_vars)]
+
+        for edge in graph.hyperedges():
+            cog_of_edge = sum(idx_of_var[var] for var in edge) / len(edge)
+            for var in edge:
+                var_idx = idx_of_var[var]
+                vi = infos[var_idx]
+                infos[var_idx] = VarInfo(vi.sum_cog + cog_of_edge, vi.num_occurs + 1)
+
+        cog_of_var = [
+            vi.sum_cog / vi.num_occurs if vi.num_occurs > 0 else 0.0 for vi in infos
+        ]
+
+        var_of_idx.sort(key=lambda x: cog_of_var[idx_of_var[x]])
+        idx_of_var = {var: idx for idx, var in enumerate(var_of_idx)}
+
+        sum_spans = compute_sum_of_spans(graph, idx_of_var)
+        if sum_spans < best_sum_spans:
+            best_sum_spans = sum_spans
+            best_order = list(var_of_idx)
+
+    return best_order
+
+
+def execute_vectorized(graph, var_of_idx, **stopping):
+    best_order, _ = force.execute_multi_start(graph, var_of_idx, 1, **stopping)
+    return best_order
+
+
+def sum_of_spans(hypergraph, order):
+    return compute_sum_of_spans(hypergraph, {var: idx for idx, var in enumerate(order)})
+
+
+def test_force__vectorized_matches_sequential():
+    hg = new_hypergraph()
+    start = hg.nodes()
+
+    assert execute_vectorized(hg, list(start)) == execute_with_order(hg, list(start))
+
+
+def test_force__vectorized_matches_sequential_on_csr():
+    _, formula = parser.load(TEST_FILE)
+    hg = cnf2hypergraph(formula, CSRHypergraph)
+    for seed in range(3):
+        start = hg.nodes()
+        random.Random(seed).shuffle(start)
+
+        assert execute_vectorized(hg, list(start)) == execute_with_order(
+            hg, list(start)
+        )
+
+
+def test_force__multi_start_is_reproducible():
+    _, formula = parser.load(TEST_FILE)
+    hg = cnf2hypergraph(formula, CSRHypergraph)
+    start = hg.nodes()
+
+    order_1, results_1 = force.execute_multi_start(hg, start, 4, workers=1, seed=7)
+    order_2, results_2 = force.execute_multi_start(hg, start, 4, workers=2, seed=7)
+
+    assert order_1 == order_2
+    assert [result.sum_spans for result in results_1] == [
+        result.sum_spans for result in results_2
+    ]
+    assert [result.start for result in results_1] == [0, 1, 2, 3]
+    assert results_1[0].seed is None
+    # The best start is kept, and the first start is plain FORCE
+    plain_order = execute_vectorized(hg, start)
+    assert sum_of_spans(hg, order_1) == min(result.sum_spans for result in results_1)
+    assert sum_of_spans(hg, plain_order) == results_1[0].sum_spans
+
+
+def test_force__stops_at_fixed_point():
+    _, formula = parser.load(TEST_FILE)
+    hg = cnf2hypergraph(formula, CSRHypergraph)
+    start = hg.nodes()
+
+    order, (result,) = force.execute_multi_start(hg, start, 1, max_iterations=1000)
+
+    assert result.iterations < 1000
+    assert sum_of_spans(hg, order) == result.sum_spans
+    # Passes after the fixed point would not change the order
+    assert order == execute_vectorized(hg, start, max_iterations=2000)
+
+
+def test_force__stops_when_stalled():
+    _, formula = parser.load(TEST_FILE)
+    hg = cnf2hypergraph(formula, CSRHypergraph)
+
+    _, (result,) = force.execute_multi_start(
+        hg, hg.nodes(), 1, max_iterations=1000, tolerance=1.0, patience=2
+    )
+
+    assert result.iterations == 2
+
+
+def test_force__heavy_edge_matching_and_contract():
+    hg = CSRHypergraph()
+    hg.add_nodes(["x0", "x1", "x2", "x3", "x4", "x5", "x6"])
+    hg.add_hyperedges(
+        [("x0", "x4"), ("x0", "x2", "x4", "x6"), ("x1", "x6"), ("x2", "x3", "x6")]
+    )
+    hg.add_hyperedge(("x4", "x5"))
+
+    cluster = force.heavy_edge_matching(hg.pins, hg.edge_offsets, 7)
+
+    # x0 and x4 share two hyperedges, the pair with the highest rating
+    assert cluster[0] == cluster[4]
+    assert cluster.max() < 6
+
+    pins, edge_offsets = force.contract(hg.pins, hg.edge_offsets, cluster)
+    for start, end in zip(edge_offsets[:-1], edge_offsets[1:]):
+        assert end - start >= 2
+        assert len(set(pins[start:end])) == end - start
+
+
+def test_force__multilevel(monkeypatch):
+    _, formula = parser.load(TEST_FILE)
+    hg = cnf2hypergraph(formula, CSRHypergraph)
+    monkeypatch.setattr(force, "COARSEST_SIZE", 10)
+
+    order, (result,) = force.execute_multi_start(hg, hg.nodes(), 1, multilevel=True)
+
+    assert len(order) == len(hg.nodes())
+    assert set(order) == set(hg.nodes())
+    assert sum_of_spans(hg, order) == result.sum_spans
+
+
+def test_force__exact_order():
+    hg = CSRHypergraph()
+    hg.add_nodes(["x0", "x1", "x2", "x3", "x4", "x5"])
+    hg.add_hyperedges([("x0", "x3"), ("x3", "x5"), ("x5", "x1"), ("x1", "x4")])
+    hg.add_hyperedge(("x4", "x2"))
+
+    order = force.exact_order(hg.pins, hg.edge_offsets, 6)
+
+    # The hyperedges form a path, which is ordered without any gaps
+    assert order.tolist() == [0, 3, 5, 1, 4, 2]
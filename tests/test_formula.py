@@ -1,3 +1,5 @@
+import gc
+
 import pytest
 
 from meta.formula import And, Formula, Not, Or, Variable
@@ -24,6 +26,25 @@ def test_properties():
     assert a.eq(b) == b.__eq__(a)
 
 
+def test_interning():
+    a = Variable("a")
+    assert Variable("a") is a
+    assert Not(Variable("a")) is ~a
+    assert ~a in (Variable("b"), Not(Variable("a")))
+    assert Not(a & a) == Not(a & a)
+    assert hash(a) == hash("a")
+    assert not hasattr(a, "__dict__")
+
+
+def test_interning__released():
+    a = Variable("unreferenced")
+    literal = ~a
+    del a, literal
+    gc.collect()
+    assert "unreferenced" not in Variable._variables
+    assert all(var.name != "unreferenced" for var in Not._literals)
+
+
 def test_extract_variables():
     a, b, c, d = Variable("a"), Variable("b"), Variable("c"), Variable("d")
     formula = (a | c | ~d) & d & (b | ~c)
@@ -31,6 +52,33 @@ def test_extract_variables():
     assert formula.extract_negated_variables() == {c, d}
 
 
+def test_deep_formula():
+    a, b = Variable("a"), Variable("b")
+    formula = a
+    for _ in range(10000):
+        formula = And(Or(~b, formula), a)
+    assert formula.extract_variables() == [b, a]
+    assert formula.extract_negated_variables() == {b}
+    assert formula.eval({a})
+    assert not formula.eval({b})
+    assert str(formula).endswith("a)) ∧ a)")
+
+
+def test_cached_structure():
+    a, b, c = Variable("a"), Variable("b"), Variable("c")
+    formula = (a | ~b) & (b | c)
+    assert formula.variables() == (a, b, c)
+    assert formula.variables() is formula.variables()
+    assert formula.negated_variables() == {b}
+    assert formula.is_cnf() and not formula.is_dnf()
+
+    formula.children = (a & ~c, b | c)
+    assert formula.variables() == (a, c, b)
+    assert formula.negated_variables() == {c}
+    assert not formula.is_cnf()
+    assert (formula | (a & b)).is_dnf()
+
+
 def test_empty_formula_error():
     plain_formula = Formula()
     with pytest.raises(NotImplementedError) as e:
@@ -5,7 +5,7 @@ import circuitgraph as cg
 import pytest
 
 from helpers import cudd_helper
-from meta.circuit import CustomCircuit
+from meta.circuit import ArrayCircuit, CustomCircuit
 
 
 def get_bdd_from_verilog_file(filename):
@@ -53,6 +53,32 @@ def test_cudd_helper__build_bdd_bc(testfile, expected_output):
     assert len(roots) == expected_output[1]
 
 
+def test_cudd_helper__build_bdd_array_circuit():
+    path_name = os.path.join(os.path.dirname(__file__), "testfiles/bc-example.txt")
+    _, circuit = parser.load(path_name)
+    var_order = CustomCircuit.get_ordered_inputs(circuit)
+    bdd, roots = cudd_helper.build_bdd_from_circuit(circuit, var_order)
+    array_bdd, array_roots = cudd_helper.build_bdd_from_circuit(
+        ArrayCircuit.from_circuit(circuit), var_order
+    )
+    assert len(array_bdd) == len(bdd)
+    assert [array_bdd.count(root) for root in array_roots] == [
+        bdd.count(root) for root in roots
+    ]
+
+
+def test_cudd_helper__build_bdd_undeclared_input():
+    circuit = CustomCircuit()
+    for node in ["a", "b", "unused"]:
+        circuit.add(node, "input")
+    circuit.add("g", "and", fanin=["a", "b"], output=True)
+
+    _, roots = cudd_helper.build_bdd_from_circuit(circuit, ["a", "b"])
+    assert len(roots) == 1
+    with pytest.raises(ValueError, match='undeclared variable "b" used by gate "g"'):
+        cudd_helper.build_bdd_from_circuit(circuit, ["a", "unused"])
+
+
 @pytest.mark.parametrize(
     "testfile,expected_output",
     [
@@ -78,3 +104,15 @@ def test_cudd_helper__count_satisfying_assignments__bc(testfile, expected_output
     bdd, roots = get_bdd_from_bc_text_file(testfile)
     assignments = cudd_helper.count_satisfying_assignments(bdd, roots)
     assert assignments == expected_output
+
+
+@pytest.mark.parametrize("clause_order", [None, [2, 0, 1]])
+def test_cudd_helper__build_bdd_formula_clause_order(clause_order):
+    path_name = os.path.join(
+        os.path.dirname(__file__), "../input_files/benchmark_test_cnf/cnf-example.txt"
+    )
+    input_format, formula = parser.load(path_name)
+    bdd, roots = cudd_helper.build_bdd_from_formula(
+        formula, formula.extract_variables(), clause_order
+    )
+    assert cudd_helper.count_satisfying_assignments(bdd, roots) == 4
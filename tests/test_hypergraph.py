@@ -1,5 +1,6 @@
 import pytest
 
+from meta.csr_hypergraph import CSRHypergraph
 from meta.hypergraph import Hypergraph
 
 
@@ -111,3 +112,109 @@ def test_hypergraph_link_unlink_link():
     hg.link("x1", "e1")
     hg.unlink("x1", "e1")
     hg.link("x1", "e1")
+
+
+def new_csr_hypergraph():
+    hypergraph = CSRHypergraph()
+    hypergraph.add_nodes(["x1", "x2", "x3", "x4", "x5"])
+    hypergraph.add_hyperedges(
+        [
+            (("x1", "x2", "x3"), "e1"),
+            (("x1", "x4"), "e2"),
+            (("x4", "x5"), "e3"),
+        ]
+    )
+    return hypergraph
+
+
+def test_csr_hypergraph__arrays():
+    hg = new_csr_hypergraph()
+
+    assert hg.pins.tolist() == [0, 1, 2, 0, 3, 3, 4]
+    assert hg.edge_offsets.tolist() == [0, 3, 5, 7]
+    assert hg.node_offsets.tolist() == [0, 2, 3, 4, 6, 7]
+    assert hg.incident_edges.tolist() == [0, 1, 0, 0, 1, 2, 2]
+    assert hg.links(("x1", "x4")) == ["x1", "x4"]
+    assert hg.links("x4") == [("x1", "x4"), ("x4", "x5")]
+    assert hg.neighbors("x1") == ["x2", "x3", "x4"]
+    assert hg.neighbors("x5") == ["x4"]
+
+
+def test_csr_hypergraph__matches_hypergraph():
+    csr_hg = new_csr_hypergraph()
+    hg = new_hypergraph()
+    for graph in [csr_hg, hg]:
+        graph.del_node("x2")
+        graph.del_hyperedge("e2")
+        graph.add_node("x6")
+        graph.link("x6", ("x4", "x5"))
+        graph.unlink("x4", ("x4", "x5"))
+
+    assert csr_hg.nodes() == hg.nodes()
+    assert csr_hg.hyperedges() == hg.hyperedges()
+    for obj in hg.nodes() + hg.hyperedges():
+        assert csr_hg.links(obj) == hg.links(obj)
+    assert csr_hg.pins.tolist() == [0, 1, 3, 4]
+    assert csr_hg.edge_offsets.tolist() == [0, 2, 4]
+
+
+def test_csr_hypergraph__convert_nodes_to_integers():
+    hg = new_csr_hypergraph()
+    copied_hg = hg.copy()
+
+    mapping = hg.convert_nodes_to_integers()
+
+    assert mapping == {"x1": 0, "x2": 1, "x3": 2, "x4": 3, "x5": 4}
+    assert hg.nodes() == [0, 1, 2, 3, 4]
+    assert hg.hyperedges() == [(0, 1, 2), (0, 3), (3, 4)]
+    assert hg.links((0, 3)) == [0, 3]
+    assert copied_hg.nodes() == ["x1", "x2", "x3", "x4", "x5"]
+
+
+def test_csr_hypergraph__errors():
+    hg = CSRHypergraph()
+    hg.add_nodes(["x1", "x2"])
+    hg.add_hyperedge(("x1", "x2"))
+    with pytest.raises(ValueError) as e:
+        hg.add_node("x1")
+    assert str(e.value) == "Node x1 already in graph"
+    with pytest.raises(ValueError) as e:
+        hg.link("x1", ("x1", "x2"))
+    assert str(e.value) == "Link (x1, ('x1', 'x2')) already in graph"
+    with pytest.raises(KeyError) as e:
+        hg.link("x3", ("x1", "x2"))
+    assert str(e.value) == "'x3'"
+
+
+def test_hypergraph_view__split():
+    hg = new_csr_hypergraph()
+    view = hg.view()
+
+    assert view.local_hyperedges() == [[0, 1, 2], [0, 3], [3, 4]]
+
+    view1, view2 = view.split([1, 0, 0, 1, 1])
+
+    assert view1.nodes() == ["x2", "x3"]
+    assert view1.hyperedges() == []
+    assert view2.nodes() == ["x1", "x4", "x5"]
+    assert view2.hyperedges() == [("x1", "x4"), ("x4", "x5")]
+    assert view2.local_hyperedges() == [[0, 1], [1, 2]]
+
+    view3, view4 = view2.split([0, 1, 1])
+
+    assert view3.nodes() == ["x1"]
+    assert view4.hyperedges() == [("x4", "x5")]
+    assert view4.local_hyperedges() == [[0, 1]]
+    # The leaves share the parent's node permutation
+    assert view.nodes() == ["x2", "x3", "x1", "x4", "x5"]
+
+
+def test_csr_hypergraph__from_local_arrays():
+    view1, view2 = new_csr_hypergraph().view().split([1, 0, 0, 1, 1])
+    pins, edge_offsets = view2.local_arrays()
+
+    hg = CSRHypergraph.from_arrays(pins, edge_offsets, view2.num_nodes)
+
+    assert hg.nodes() == [0, 1, 2]
+    assert hg.hyperedges() == [0, 1]
+    assert hg.view().local_hyperedges() == view2.local_hyperedges() == [[0, 1], [1, 2]]
@@ -1,8 +1,17 @@
-import math
+import os
+import parser
 
-from heuristics import mince_manual
+import numpy as np
+
+from helpers.cnf2hypergraph import cnf2hypergraph
+from heuristics import mince, mince_manual
+from meta.csr_hypergraph import CSRHypergraph
 from meta.hypergraph import Hypergraph
 
+TEST_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "input_files", "iscas-new", "b01.bench.dimacs"
+)
+
 
 def new_hypergraph():
     # Create a new instance of the Hypergraph class from lecture slides
@@ -25,16 +34,6 @@ def new_hypergraph():
     return hypergraph
 
 
-def test_powerset():
-    hg = new_hypergraph()
-
-    powerset = mince_manual.powerset(hg.nodes())
-    n = len(hg.nodes())
-    expected_length = sum(math.comb(n, r) for r in range(n // 3, n // 2 + 2))
-
-    assert len(list(powerset)) == expected_length
-
-
 def test_balanced_mincut():
     hg = new_hypergraph()
 
@@ -54,8 +53,11 @@ def test_balanced_mincut():
     set_2_3 = set(mince_manual.balanced_mincut(hypergraph_2))
     set_2_4 = set(hypergraph_2.nodes()).difference(set_2_3)
 
-    assert set_2_1 == {"x2", "x3"}
-    assert set_2_2 == {"x1", "x6"}
+    # Without x0, x4 and x5, both splits cut two of the remaining hyperedges
+    assert (set_2_1, set_2_2) in [
+        ({"x2", "x3"}, {"x1", "x6"}),
+        ({"x2", "x6"}, {"x1", "x3"}),
+    ]
     assert set_2_3 == {"x5"}
     assert set_2_4 == {"x0", "x4"}
 
@@ -65,3 +67,109 @@ def test_mince():
     result_string, result_order = mince_manual.calculate(hg)
 
     assert result_order == ["x3", "x2", "x6", "x1", "x5", "x4", "x0"]
+
+
+def test_balanced_mincut__fm():
+    _, formula = parser.load(TEST_FILE)
+    hg = cnf2hypergraph(formula)
+    n = len(hg.nodes())
+
+    cut = mince_manual.balanced_mincut(hg)
+    _, result_order = mince_manual.calculate(formula)
+
+    assert n / 3 <= len(cut) <= 2 * n / 3
+    assert mince_manual.balanced_mincut(hg) == cut
+    assert sorted(result_order, key=str) == sorted(hg.nodes(), key=str)
+
+
+class FakePartitioner(mince.Partitioner):
+    """Deterministic stand-in for mtkahypar.
+
+    The nodes are split into equal chunks in order of their first hyperedge,
+    chunk ``c`` being numbered ``block_ids[c]`` if given.
+    """
+
+    def __init__(self, block_ids=None):
+        super().__init__()
+        self.block_ids = block_ids
+
+    def context(self, num_blocks=2):
+        return None
+
+    def partition_blocks(self, context, num_nodes, pins, edge_offsets, num_blocks=2):
+        first_edge = np.full(num_nodes, len(edge_offsets), dtype=np.int64)
+        edges = np.repeat(np.arange(len(edge_offsets) - 1), np.diff(edge_offsets))
+        np.minimum.at(first_edge, pins, edges)
+        order = np.lexsort((np.arange(num_nodes), first_edge))
+        blocks = np.empty(num_nodes, dtype=np.int64)
+        blocks[order] = np.arange(num_nodes) * num_blocks // num_nodes
+        if self.block_ids is not None:
+            blocks = np.asarray(self.block_ids)[blocks]
+        return blocks
+
+
+def random_hypergraph(num_nodes, num_edges, seed=0):
+    rng = np.random.default_rng(seed)
+    edges = [
+        sorted(set((start + rng.integers(0, 20, rng.integers(2, 5))) % num_nodes))
+        for start in rng.integers(0, num_nodes, num_edges)
+    ]
+    pins = np.concatenate(edges)
+    edge_offsets = np.concatenate(([0], np.cumsum([len(edge) for edge in edges])))
+    return CSRHypergraph.from_arrays(pins, edge_offsets, num_nodes)
+
+
+def path_hypergraph(num_nodes):
+    pins = np.repeat(np.arange(num_nodes), 2)[1:-1]
+    return CSRHypergraph.from_arrays(pins, np.arange(0, len(pins) + 1, 2), num_nodes)
+
+
+def test_mince__workers():
+    hypergraph = random_hypergraph(mince.SUBTREE_SIZE + 1000, 5000)
+
+    _, sequential = mince.calculate(hypergraph, partitioner=FakePartitioner())
+    partitioner = FakePartitioner()
+    _, parallel = mince.calculate(hypergraph, workers=2, partitioner=partitioner)
+
+    assert parallel == sequential
+    assert sorted(sequential) == hypergraph.nodes()
+    assert len(partitioner.seconds) == mince.SUBTREE_SIZE + 999
+
+
+def test_mince__leaf_cutoff():
+    hypergraph = random_hypergraph(200, 400)
+    calls = {}
+    for options in [{}, {"leaf_size": 8}, {"leaf_edges": 10}]:
+        partitioner = FakePartitioner()
+        _, order = mince.calculate(hypergraph, partitioner=partitioner, **options)
+        assert sorted(order) == hypergraph.nodes()
+        calls[tuple(options)] = len(partitioner.seconds)
+
+    assert calls[()] == 199
+    assert calls[("leaf_size",)] < calls[()]
+    assert calls[("leaf_edges",)] < calls[()]
+
+
+def test_mince__num_blocks():
+    hypergraph = path_hypergraph(9)
+    view = hypergraph.view()
+    # The middle chunk of the path is numbered last by the partitioner
+    partitioner = FakePartitioner(block_ids=[0, 2, 1])
+
+    blocks = partitioner.partition(9, *view.local_arrays(), 3)
+    order = mince.kahypar(view, partitioner, num_blocks=3)
+
+    assert blocks.tolist() == [0, 0, 0, 1, 1, 1, 2, 2, 2]
+    assert order == list(range(9))
+
+
+def test_mince__worker_copy(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    partitioner = FakePartitioner()
+    partitioner.seconds.append(1.0)
+
+    assert partitioner.worker_copy(3).threads == 2
+    assert partitioner.worker_copy(16).threads == 1
+    assert partitioner.worker_copy().threads == 1
+    assert partitioner.worker_copy(3).seconds == []
+    assert mince.Partitioner(threads=4).worker_copy(3).threads == 4
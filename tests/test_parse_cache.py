@@ -0,0 +1,115 @@
+import os
+import parser
+
+import circuitgraph as cg
+
+from helpers.parse_cache import ParseCache
+from meta.circuit import CustomCircuit
+
+
+def write_file(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, "w") as fp:
+        fp.write(text)
+    return path
+
+
+def test_parse_cache__cnf_roundtrip(tmp_path, monkeypatch):
+    cache = ParseCache(directory=str(tmp_path / "cache"))
+    path = write_file(tmp_path, "example.cnf", "p cnf 4 3\n1 3 -4 0\n4 0\n2 -3 0\n")
+
+    cold_format, cold_formula = cache.load(path)
+
+    def fail_parse(path):
+        raise AssertionError("A warm load should not parse the file")
+
+    monkeypatch.setattr(parser, "load", fail_parse)
+    warm_format, warm_formula = cache.load(path)
+
+    assert cold_format == warm_format == "cnf"
+    assert str(warm_formula) == str(cold_formula)
+    assert warm_formula.store.offsets.tolist() == [0, 3, 4, 6]
+
+
+def test_parse_cache__bc_roundtrip(tmp_path):
+    cache = ParseCache(directory=str(tmp_path / "cache"))
+    path = write_file(
+        tmp_path,
+        "example.txt",
+        "BC1.1\nVAR B;\nVAR A;\nAND GATE AND1 A B;\nASSIGN OUTPUT AND1;",
+    )
+
+    cache.load(path)
+    input_format, circuit = cache.load(path)
+
+    assert input_format == "bc"
+    assert isinstance(circuit, CustomCircuit)
+    assert CustomCircuit.get_ordered_inputs(circuit) == ["B", "A"]
+    assert circuit.outputs() == {"OUTPUT"}
+
+
+def test_parse_cache__blackboxes_roundtrip(tmp_path):
+    cache = ParseCache(directory=str(tmp_path / "cache"))
+    circuit = CustomCircuit(name="example")
+    circuit.add("a", "input")
+    circuit.add_blackbox(cg.BlackBox("box", ["i"], ["o"]), "inst", {"i": "a"})
+
+    cache.put("key", "v", circuit)
+    input_format, cached = cache.get("key")
+
+    assert input_format == "v"
+    assert list(cached.blackboxes) == ["inst"]
+    assert cached.blackboxes["inst"].name == "box"
+
+
+def test_parse_cache__failed_write_is_not_cached(tmp_path, monkeypatch):
+    cache = ParseCache(directory=str(tmp_path / "cache"))
+    path = write_file(tmp_path, "example.cnf", "p cnf 2 1\n1 2 0\n")
+
+    def fail_replace(source, destination):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    input_format, formula = cache.load(path)
+
+    assert input_format == "cnf"
+    assert str(formula) == "((1 ∨ 2))"
+    assert os.listdir(cache.directory) == []
+
+
+def test_parse_cache__content_change_is_a_miss(tmp_path):
+    cache = ParseCache(directory=str(tmp_path / "cache"))
+    path = write_file(tmp_path, "example.cnf", "p cnf 2 1\n1 2 0\n")
+    cache.load(path)
+
+    write_file(tmp_path, "example.cnf", "p cnf 2 1\n1 -2 0\n")
+    input_format, formula = cache.load(path)
+
+    assert str(formula) == "((1 ∨ ¬2))"
+    assert len(os.listdir(cache.directory)) == 2
+
+
+def test_parse_cache__lru_eviction(tmp_path):
+    cache = ParseCache(directory=str(tmp_path / "cache"))
+    first = write_file(tmp_path, "first.cnf", "p cnf 2 1\n1 2 0\n")
+    second = write_file(tmp_path, "second.cnf", "p cnf 2 1\n1 -2 0\n")
+    cache.load(first)
+    os.utime(cache._entry_path(cache.key(first)), (0, 0))
+
+    # Room for one entry only
+    cache.max_bytes = 3 * os.path.getsize(cache._entry_path(cache.key(first))) // 2
+    cache.load(second)
+
+    assert cache.get(cache.key(first)) is None
+    assert cache.get(cache.key(second)) is not None
+
+
+def test_parse_cache__corrupt_entry_is_a_miss(tmp_path):
+    cache = ParseCache(directory=str(tmp_path / "cache"))
+    path = write_file(tmp_path, "example.cnf", "p cnf 2 1\n1 2 0\n")
+    cache.load(path)
+    with open(cache._entry_path(cache.key(path)), "wb") as fp:
+        fp.write(b"corrupt")
+
+    assert cache.get(cache.key(path)) is None
+    assert cache.load(path)[0] == "cnf"
@@ -1,3 +1,6 @@
+import bz2
+import gzip
+import lzma
 import os
 import parser
 import tempfile
@@ -5,7 +8,9 @@ import tempfile
 import circuitgraph
 import pytest
 
+from heuristics import embedded_order
 from meta.circuit import CustomCircuit
+from meta.formula import And, Not, Variable
 
 
 @pytest.mark.parametrize(
@@ -39,6 +44,30 @@ def test_input_file_basic__sat(input_string, expected_output):
             os.remove(temp_file_path)
 
 
+def test_input_file_deeply_nested__sat():
+    """Test that deeply nested sentences are parsed and traversed without
+    hitting the recursion limit."""
+    depth = 5000
+    text = "p sat 2\n" + "*(+(-1 " * depth + "2" + "))" * depth
+
+    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as temp_file:
+        temp_file.write(text)
+        temp_file_path = temp_file.name
+
+    try:
+        input_format, formula = parser.load(temp_file_path)
+
+        assert input_format == "sat"
+        assert [str(var) for var in formula.extract_variables()] == ["1", "2"]
+        assert {str(var) for var in formula.extract_negated_variables()} == {"1"}
+        assert formula.eval(set(formula.extract_variables()))
+        assert str(formula).startswith("((¬1 ∨ ((¬1 ∨ ((¬1")
+    finally:
+        # Clean up the temporary file
+        if temp_file_path:
+            os.remove(temp_file_path)
+
+
 def test_input_file_basic__cnf():
     """Test a basic correct cnf input, taken into account a random
     ordering within the clauses."""
@@ -65,6 +94,139 @@ def test_input_file_basic__cnf():
             os.remove(temp_file_path)
 
 
+def test_input_file_clause_store__cnf():
+    """Test that the cnf clauses are stored as flat literals and offsets, and
+    that the clause formulas are only built when they are accessed."""
+    text = "p cnf 4 2\n1 3-4 0 4\n0\n2 -3 0\n-1"
+
+    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as temp_file:
+        temp_file.write(text)
+        temp_file_path = temp_file.name
+
+    try:
+        input_format, formula = parser.load(temp_file_path)
+
+        assert input_format == "cnf"
+        assert formula.store.literals.tolist() == [1, 3, -4, 4, 2, -3, -1]
+        assert formula.store.offsets.tolist() == [0, 3, 4, 6, 7]
+        assert formula.store.num_variables == 4
+        assert [str(var) for var in formula.extract_variables()] == [
+            "1",
+            "3",
+            "4",
+            "2",
+        ]
+        assert formula._children is None
+        assert str(formula) == "((1 ∨ 3 ∨ ¬4) ∧ (4) ∧ (2 ∨ ¬3) ∧ (¬1))"
+        assert formula.is_cnf()
+        assert len(formula.children) == 4
+        assert str(formula) == "((1 ∨ 3 ∨ ¬4) ∧ (4) ∧ (2 ∨ ¬3) ∧ (¬1))"
+    finally:
+        # Clean up the temporary file
+        if temp_file_path:
+            os.remove(temp_file_path)
+
+
+def test_input_file_clause_store_children__cnf():
+    """Test that assigning the children of a cnf formula detaches its clause
+    store."""
+    text = "p cnf 3 2\n1 -2 0\n2 3 0\n"
+
+    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as temp_file:
+        temp_file.write(text)
+        temp_file_path = temp_file.name
+
+    try:
+        _, formula = parser.load(temp_file_path)
+        formula.children = (And(Variable(1), Not(Variable(4))),)
+
+        assert formula.store is None
+        assert [str(var) for var in formula.variables()] == ["1", "4"]
+        assert [str(var) for var in formula.negated_variables()] == ["4"]
+        assert not formula.is_cnf()
+        assert str(formula) == "((1 ∧ ¬4))"
+    finally:
+        # Clean up the temporary file
+        if temp_file_path:
+            os.remove(temp_file_path)
+
+
+def test_input_file_order_hints__cnf():
+    """Test that the nested-bracket variable and clause orders embedded in
+    the comments are decoded into flat orders."""
+    text = (
+        "c co [[[1], [2]], [0]]\nc vo [[[3]], [[1], [[4], [2]]]]\nc 1 x1\n"
+        "p cnf 4 3\n1 3 -4 0\n4 0\n2 -3 0\n"
+    )
+
+    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as temp_file:
+        temp_file.write(text)
+        temp_file_path = temp_file.name
+
+    try:
+        input_format, formula = parser.load(temp_file_path)
+
+        assert input_format == "cnf"
+        assert formula.store.variable_order.tolist() == [3, 1, 4, 2]
+        assert formula.store.clause_order.tolist() == [1, 2, 0]
+        assert len(formula.children) == 3
+    finally:
+        # Clean up the temporary file
+        if temp_file_path:
+            os.remove(temp_file_path)
+
+
+def test_embedded_order_without_hint__cnf(capsys):
+    """Test that the embedded heuristic falls back to the input order when
+    the input file has no 'c vo' line."""
+    text = "c Example CNF format file\nc\np cnf 4 3\n3 1 -4 0\n4 0\n2 -3 0\n"
+
+    with tempfile.NamedTemporaryFile(mode="w+", delete=False) as temp_file:
+        temp_file.write(text)
+        temp_file_path = temp_file.name
+
+    try:
+        _, formula = parser.load(temp_file_path)
+        order_string, var_order = embedded_order.calculate(formula)
+
+        assert "No embedded variable order found" in capsys.readouterr().out
+        assert order_string == "3 < 1 < 4 < 2"
+        assert [str(var) for var in var_order] == ["3", "1", "4", "2"]
+    finally:
+        # Clean up the temporary file
+        if temp_file_path:
+            os.remove(temp_file_path)
+
+
+@pytest.mark.parametrize(
+    "compress,suffix",
+    [
+        (gzip.compress, ".cnf.gz"),
+        (lzma.compress, ".cnf.xz"),
+        (bz2.compress, ".cnf.bz2"),
+        (gzip.compress, ".txt"),
+    ],
+)
+def test_input_file_compressed__cnf(compress, suffix):
+    """Test that compressed input is detected and decompressed on the fly,
+    also when the suffix does not reveal the compression."""
+    text = "c Example CNF format file\nc\np cnf 4 3\n1 3 -4 0\n4 0\n2 -3 0\n"
+
+    with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=suffix) as f:
+        f.write(compress(text.encode()))
+        temp_file_path = f.name
+
+    try:
+        input_format, formula = parser.load(temp_file_path)
+
+        assert input_format == "cnf"
+        assert str(formula) == "((1 ∨ 3 ∨ ¬4) ∧ (4) ∧ (2 ∨ ¬3))"
+    finally:
+        # Clean up the temporary file
+        if temp_file_path:
+            os.remove(temp_file_path)
+
+
 @pytest.mark.parametrize(
     "input_string,error_string",
     [
@@ -230,6 +392,39 @@ def test_input_file_basic_verilog(input_string, expected_output):
             os.remove(temp_file_path)
 
 
+def test_input_file_compressed__verilog():
+    """Test reading a gzip compressed verilog file."""
+    text = (
+        "module c17 (N1,N2,N3,N6,N7,N22,N23);\n\ninput N1,N2,N3,N6,N7;\n\noutput"
+        " N22,N23;\n\nwire N10,N11,N16,N19;\n\nnand NAND2_1 (N10, N1, N3);\nnand"
+        " NAND2_2 (N11, N3, N6);\nnand NAND2_3 (N16, N2, N11);\nnand NAND2_4 (N19,"
+        " N11, N7);\nnand NAND2_5 (N22, N10, N16);\nnand NAND2_6 (N23, N16,"
+        " N19);\n\nendmodule"
+    )
+
+    with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".v.gz") as f:
+        f.write(gzip.compress(text.encode()))
+        temp_file_path = f.name
+
+    try:
+        input_format, circuit = parser.load(temp_file_path)
+
+        assert input_format == "v"
+        assert isinstance(circuit, CustomCircuit)
+        assert CustomCircuit.get_ordered_inputs(circuit) == [
+            "N1",
+            "N2",
+            "N3",
+            "N6",
+            "N7",
+        ]
+        assert len(circuit.outputs()) == 2
+    finally:
+        # Clean up the temporary file
+        if temp_file_path:
+            os.remove(temp_file_path)
+
+
 @pytest.mark.parametrize(
     "input_string,error_string",
     [